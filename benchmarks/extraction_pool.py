@@ -0,0 +1,74 @@
+"""Measure concurrent extraction throughput of a shared YoutubeDL instance and of the pool.
+
+Usage:
+    python -m benchmarks.extraction_pool [-c CONCURRENCY] [-n REQUESTS] [query ...]
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import statistics
+import time
+
+import yt_dlp
+
+from cogs.music import YTDL_OPTIONS
+from utils.extraction import EXTRACTION_WORKERS, YoutubeDLPool, classify_input
+
+DEFAULT_QUERIES = [
+    'never gonna give you up',
+    'bohemian rhapsody queen',
+    'океан ельзи без бою',
+    'daft punk around the world',
+    'lofi hip hop',
+    'the beatles let it be',
+]
+
+
+def extract(ytdl: yt_dlp.YoutubeDL, search: str) -> dict:
+    query = classify_input(search)
+    info = ytdl.extract_info(query.url, download=False, process=False, ie_key=query.ie_key)
+    list(info.get('entries') or [])
+    return info
+
+
+async def run(name: str, call, queries: list, requests: int, concurrency: int) -> None:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(search: str):
+        async with semaphore:
+            start = time.perf_counter()
+            await call(search)
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(queries[i % len(queries)]) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    print(f'{name:>6}: {requests / elapsed:6.2f} extractions/s, '
+          f'median latency {statistics.median(latencies) * 1000:7.1f} ms, '
+          f'max {max(latencies) * 1000:7.1f} ms')
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-c', '--concurrency', type=int, default=EXTRACTION_WORKERS)
+    parser.add_argument('-n', '--requests', type=int, default=24)
+    parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+    args = parser.parse_args()
+    loop = asyncio.get_running_loop()
+
+    # the old setup: one instance used from the default executor
+    shared = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+    executor = concurrent.futures.ThreadPoolExecutor(max_workers=args.concurrency)
+    await loop.run_in_executor(executor, extract, shared, args.queries[0])  # warm up
+    await run('shared', lambda search: loop.run_in_executor(executor, extract, shared, search),
+              args.queries, args.requests, args.concurrency)
+
+    pool = YoutubeDLPool(YTDL_OPTIONS, workers=args.concurrency)
+    await loop.run_in_executor(None, pool.warm_up)
+    await run('pool', lambda search: pool.run(extract, search, loop=loop),
+              args.queries, args.requests, args.concurrency)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
@@ -0,0 +1,74 @@
+"""Measure how long `/play` spends in extraction for free text searches.
+
+Compares the old path (generic extractor, then a second call with the returned search URL)
+with the fast path (search prefix sent straight to the search extractor).
+
+Usage:
+    python -m benchmarks.search [-n ROUNDS] [query ...]
+"""
+import argparse
+import statistics
+import time
+
+import yt_dlp
+
+from cogs.music import YTDL_OPTIONS
+from utils.extraction import classify_input
+
+DEFAULT_QUERIES = [
+    'never gonna give you up',
+    'bohemian rhapsody queen',
+    'океан ельзи без бою',
+    'daft punk around the world',
+]
+
+
+def old_path(ytdl: yt_dlp.YoutubeDL, search: str) -> dict:
+    info = ytdl.extract_info(search, download=False, process=False)
+    if info.get('extractor') == 'generic' and info.get('url') != search:
+        info = ytdl.extract_info(info['url'], download=False, process=False)
+    list(info.get('entries') or [])  # entries are lazy, make sure the search actually ran
+    return info
+
+
+def fast_path(ytdl: yt_dlp.YoutubeDL, search: str) -> dict:
+    query = classify_input(search)
+    info = ytdl.extract_info(query.url, download=False, process=False, ie_key=query.ie_key)
+    list(info.get('entries') or [])
+    return info
+
+
+def measure(func, ytdl: yt_dlp.YoutubeDL, queries: list, rounds: int) -> list:
+    timings = []
+    for _ in range(rounds):
+        for search in queries:
+            start = time.perf_counter()
+            func(ytdl, search)
+            timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('-n', '--rounds', type=int, default=3)
+    parser.add_argument('queries', nargs='*', default=DEFAULT_QUERIES)
+    args = parser.parse_args()
+
+    ytdl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+    # warm up extractors and connections so the first measured call isn't penalized
+    fast_path(ytdl, args.queries[0])
+    old_path(ytdl, args.queries[0])
+
+    results = {}
+    for name, func in (('old', old_path), ('fast', fast_path)):
+        results[name] = timings = measure(func, ytdl, args.queries, args.rounds)
+        print(f'{name:>5}: median {statistics.median(timings) * 1000:7.1f} ms, '
+              f'mean {statistics.mean(timings) * 1000:7.1f} ms, '
+              f'max {max(timings) * 1000:7.1f} ms ({len(timings)} searches)')
+
+    saved = statistics.median(results['old']) - statistics.median(results['fast'])
+    print(f'saved per /play: {saved * 1000:.1f} ms (median)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""Summarize `/play` traces written to TRACE_FILE by bot and guild.
+
+Usage:
+    python -m benchmarks.traces traces.jsonl [--by bot|guild|both]
+"""
+import argparse
+import collections
+import json
+
+from utils.tracing import PERCENTILES, percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('file')
+    parser.add_argument('--by', choices=('bot', 'guild', 'both'), default='both')
+    args = parser.parse_args()
+
+    # group -> span name -> durations in ms
+    groups = collections.defaultdict(lambda: collections.defaultdict(list))
+    statuses = collections.Counter()
+    with open(args.file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            trace = json.loads(line)
+            statuses[trace['status']] += 1
+
+            if args.by == 'bot':
+                group = trace['bot']
+            elif args.by == 'guild':
+                group = trace['guild']
+            else:
+                group = f'{trace["bot"]} / {trace["guild"]}'
+
+            if trace['status'] == 'ok':
+                groups[group]['total'].append(trace['total_ms'])
+            for span in trace['spans']:
+                groups[group][span['name']].append(span['duration_ms'])
+
+    print('statuses:', ', '.join(f'{status}: {count}' for status, count in statuses.most_common()))
+    for group, spans in sorted(groups.items(), key=lambda item: str(item[0])):
+        print(f'\n{group}')
+        for name, durations in spans.items():
+            stats = ', '.join(f'p{p} {percentile(durations, p):8.1f} ms' for p in PERCENTILES)
+            print(f'  {name:<15} {stats} (n={len(durations)})')
+
+
+if __name__ == '__main__':
+    main()
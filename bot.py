@@ -5,34 +5,65 @@ import discord
 from discord.ext import commands
 from discord.utils import setup_logging
 
-from cogs import MusicCog
-
 from dotenv import load_dotenv
+# before importing the cogs, their settings are read from the environment on import
 load_dotenv()
 
+from cogs import MusicCog
+from utils import env_flag, process_rss
+
 logger = logging.getLogger()
 setup_logging()  # setup discord.py's default logger
 
 
+def gateway_options(low_memory: bool = False) -> dict:
+    """Get gateway and cache options for a bot.
+
+    In low memory mode the bot only subscribes to the events a music bot needs
+    (guilds for the channel cache, voice states for joining and listeners)
+    and keeps only members that are sitting in voice channels.
+    Slash commands and buttons are interactions, so they don't need any intents.
+    """
+    if not low_memory:
+        return {'intents': discord.Intents.default()}
+
+    intents = discord.Intents.none()
+    intents.guilds = True
+    intents.voice_states = True
+
+    member_cache_flags = discord.MemberCacheFlags.none()
+    member_cache_flags.voice = True  # needed to count listeners for vote skip
+
+    return {
+        'intents': intents,
+        'member_cache_flags': member_cache_flags,
+        'max_messages': None,
+        'chunk_guilds_at_startup': False,
+    }
+
+
 class Instruity(commands.Bot):
     def __init__(
         self,
         token: str,
         speciality: str = None,
+        low_memory: bool = False,
+        broadcast: bool = False,
         **kwargs,
     ):
         super().__init__(**{
             'command_prefix': '!',  # required by discord.py but not used
-            'intents': discord.Intents.default(),
             'help_command': None,
+            **gateway_options(low_memory),
             **kwargs
         })
         self.token = token
         self.speciality = speciality
+        self.low_memory = low_memory
+        self.broadcast = broadcast  # share one stream of the speciality between all guilds
         self.logger = logger  # fallback logger, will be replaced in on_ready when bot's name is known
 
-        hidden = os.environ.get('HIDDEN', '').lower() in ('1', 'true', 'yes', 'y', 'on')
-        if hidden:
+        if env_flag('HIDDEN'):
             self.status = discord.Status.invisible
 
     async def wrapped_connect(self):
@@ -48,6 +79,23 @@ class Instruity(commands.Bot):
         self.logger.info(f'Logged in as {self.user.name}')
 
         await self.tree.sync()
+        self.logger.info(self.format_memory_report())
+
+    def memory_report(self) -> dict:
+        """Count objects kept in the bot's caches."""
+        return {
+            'guilds': len(self.guilds),
+            'channels': sum(len(guild.channels) for guild in self.guilds),
+            'members': sum(len(guild.members) for guild in self.guilds),
+            'users': len(self.users),
+            'messages': len(self.cached_messages),
+            'voice_clients': len(self.voice_clients),
+        }
+
+    def format_memory_report(self) -> str:
+        report = ', '.join(f'{key}: {value}' for key, value in self.memory_report().items())
+        mode = 'low memory' if self.low_memory else 'default'
+        return f'Cache ({mode} mode) - {report}; process RSS: {process_rss() / 2**20:.1f} MiB'
 
 
 def main():
@@ -77,7 +125,12 @@ def main():
     if not specialities:
         specialities = [None] * len(tokens)
 
-    bots = [Instruity(token, speciality) for token, speciality in zip(tokens, specialities)]
+    low_memory = env_flag('LOW_MEMORY')
+    broadcast = env_flag('BROADCAST')
+    bots = [
+        Instruity(token, speciality, low_memory, broadcast)
+        for token, speciality in zip(tokens, specialities)
+    ]
     loop = asyncio.get_event_loop()
     loop.run_until_complete(
         asyncio.gather(
@@ -1,16 +1,25 @@
 import math
 import asyncio
+import collections
 import functools
+import io
 import typing
 import discord
 import itertools
 import random
+import time
 import yt_dlp
 
 from discord.ext import commands
 from discord import app_commands
 
 from utils import smart_send, is_admin
+from utils.broadcast import get_broadcast, is_live, broadcast_report
+from utils.loudness import analyzer as loudness_analyzer, cache as loudness_cache
+from utils.playlist import PlaylistException, dump_json, dump_m3u, parse_playlist
+from utils.tracks import registry as track_registry
+from utils.tracing import Trace, TracedSource, trace_span, tracer
+from utils.extraction import YoutubeDLPool, run_extraction, backoff_delay, classify_input, is_single_track, youtube_video_id, breaker_report, ErrorKind, ExtractionError, CircuitOpenError
 
 # handling exceptions
 import traceback
@@ -42,6 +51,25 @@ FFMPEG_OPTIONS = {
     'before_options': '-reconnect 1 -reconnect_streamed 1 -reconnect_on_network_error 1 -reconnect_on_http_error 1 -reconnect_delay_max 10',
     'options': '-vn',
 }
+# cheap single pass normalization for tracks whose loudness wasn't analyzed yet
+FALLBACK_FFMPEG_OPTIONS = {
+    'before_options': FFMPEG_OPTIONS['before_options'],
+    'options': '-vn -filter:a dynaudnorm=f=500:g=31:p=0.5:m=4',
+}
+# broadcasts are encoded once for everyone, so the volume is applied by FFmpeg
+BROADCAST_FFMPEG_OPTIONS = {
+    'before_options': FFMPEG_OPTIONS['before_options'],
+    'options': f'-vn -filter:a volume={DEFAULT_VOLUME}',
+}
+BROADCAST_URL_TTL = 60 * 60  # stream URLs expire, resolve them again before starting a new broadcast
+RELATED_LIMIT = 25  # tracks of the related mix to pick autoplay tracks from
+HISTORY_LENGTH = 50  # played tracks remembered per guild for autoplay
+HISTORY_NO_REPEAT = 10  # autoplay doesn't pick the last played tracks from history
+MAX_IMPORT_TRACKS = 5000
+MAX_IMPORT_SIZE = 2 * 2**20  # bytes
+IMPORT_BATCH_SIZE = 10  # imported tracks resolved together in the background
+IMPORT_CONCURRENCY = 2  # extractions at once for all imports, leaves the pool to /play
+IMPORT_PRELOAD = 5  # streams resolved right after import, the rest are preloaded by the queue
 
 RANDOM_FOOTERS = [
     {'text': 'Слава Україні!'},
@@ -51,6 +79,10 @@ RANDOM_FOOTERS = [
 ]
 RANDOM_FOOTER_CHANCE = 0.1
 
+FRAME_LENGTH = discord.opus.Encoder.FRAME_LENGTH / 1000  # seconds of audio per read
+
+RATE_LIMITED_MESSAGE = 'Сервіс тимчасово обмежує запити, спробуйте пізніше'
+
 # ignore bug report messages
 yt_dlp.utils.bug_reports_message = lambda *args, **kwargs: ''
 
@@ -58,6 +90,11 @@ yt_dlp.utils.bug_reports_message = lambda *args, **kwargs: ''
 class SongException(Exception):
     """A custom exception for Song.create_source."""
 
+    def __init__(self, message: str, retry_in: float | None = None):
+        super().__init__(message)
+        # the site is throttling us or unreachable, the song may load after this many seconds
+        self.retry_in = retry_in
+
 
 class SongQueue(asyncio.Queue):
     """A song queue object."""
@@ -82,14 +119,16 @@ class SongQueue(asyncio.Queue):
         del self._queue[index]
 
     async def add(self, item: typing.Union['Song', typing.List['Song']]):
+        was_empty = len(self._queue) == 0
         if isinstance(item, list):
+            # the queue is unbounded, so a batch is added without waiting on every item
             for i in item:
-                await self.put(i)
+                self.put_nowait(i)
         else:
             await self.put(item)
 
         # preload the song if it's the next in the queue
-        if len(self._queue) == 1:
+        if was_empty:
             self.preload()
 
     async def get(self):
@@ -107,16 +146,34 @@ class SongQueue(asyncio.Queue):
         loop.create_task(song.load(raise_errors=False))
 
 
+class SongSource(discord.PCMVolumeTransformer):
+    """Volume transformer that keeps track of the playback position."""
+
+    def __init__(self, original: discord.AudioSource, volume: float = 1.0, start: float = 0.0):
+        super().__init__(original, volume)
+        self.start = start
+        self.frames = 0
+
+    def read(self) -> bytes:
+        self.frames += 1
+        return super().read()
+
+    @property
+    def position(self) -> float:
+        return self.start + self.frames * FRAME_LENGTH
+
+
 class Song:
     """An object that contains basic info about song and can be used in player as music source."""
-    ytdl = yt_dlp.YoutubeDL(YTDL_OPTIONS)
+    ytdl_pool = YoutubeDLPool(YTDL_OPTIONS)
 
     def __init__(self, requester: discord.Member, data: dict, volume: float = DEFAULT_VOLUME):
         _type = data.get('_type')
 
         self.uploader = data.get('uploader')
         self.title = data.get('title')
-        self.duration = self.parse_duration(int(data.get('duration')))
+        self.duration_seconds = int(data.get('duration'))
+        self.duration = self.parse_duration(self.duration_seconds)
 
         if _type is None:  # if it's a single song
             self.uploader_url = data.get('uploader_url')
@@ -140,11 +197,35 @@ class Song:
         self.requester = requester
         self.skip_votes = set()
         self.volume = volume
-        self.transformer: discord.PCMVolumeTransformer | None = None
+        self.gain = 1.0  # loudness normalization multiplier, applied on top of the volume
+        self.start_at = 0.0  # position the next restart starts from, e.g. a restored one
+        self.transformer: SongSource | None = None
+        self.trace: Trace | None = None  # set for the first song of a traced `/play` until it starts playing
 
     def __str__(self):
         return f'**{self.title}** від **{self.uploader}**'
 
+    def fill_metadata(self, info: dict) -> None:
+        """Fill in the fields an imported playlist didn't have, e.g. M3U entries only have a title."""
+        self.title = self.title or info.get('title')
+        self.uploader = self.uploader or info.get('uploader')
+        self.uploader_url = self.uploader_url or info.get('uploader_url')
+        if not self.duration_seconds:
+            self.duration_seconds = int(info.get('duration') or 0)
+            self.duration = self.parse_duration(self.duration_seconds)
+
+    def to_data(self) -> dict:
+        """Metadata of the song in the format accepted by the constructor, used to create it again without searching."""
+        return {
+            'title': self.title,
+            'uploader': self.uploader,
+            'uploader_url': self.uploader_url,
+            'duration': self.duration_seconds,
+            'thumbnail': self.thumbnail,
+            'webpage_url': self.url,
+            'url': self.stream_url,
+        }
+
     @classmethod
     async def create_sources(self, search: str, requester: discord.Member, loop: asyncio.BaseEventLoop = None):
         """Create a new song source from a search.
@@ -158,39 +239,35 @@ class Song:
             SongException: Raised when can't find song.
 
         Returns:
-            typing.Generator[Song]: A generator of songs.
+            typing.List[Song]: Found songs.
         """
 
         loop = loop or asyncio.get_event_loop()
+        query = classify_input(search)
 
-        partial = functools.partial(
-            self.ytdl.extract_info,
-            search,
-            download=False,
-            process=False,
-        )
-
-        try_count = 0
-        while True:
-            try:
-                processed_info = await loop.run_in_executor(None, partial)
-            except:
-                if try_count < 2:  # try get song 2 times, otherwise - give exception
-                    try_count += 1
-                    await asyncio.sleep(0.1)
-                    continue
-
-                print('Error while searching song:', search)
-                print(traceback.format_exc())
+        try:
+            processed_info = await run_extraction(
+                self.ytdl_pool,
+                self._extract_flat,
+                query.url,
+                ie_key=query.ie_key,
+                extractor=query.extractor,
+                loop=loop,
+            )
+        except CircuitOpenError:
+            raise SongException(RATE_LIMITED_MESSAGE)
+        except ExtractionError as e:
+            print('Error while searching song:', search)
+            print(traceback.format_exc())
 
-                raise SongException(f'Сталася помилка при отримані треку за запитом "{search}"')
-            else:
-                break
+            if e.kind == ErrorKind.RATE_LIMITED:
+                raise SongException(RATE_LIMITED_MESSAGE)
+            raise SongException(f'Сталася помилка при отримані треку за запитом "{search}"')
 
         if processed_info is None:
             raise SongException(f'Щось пішло не так при отримані треку за запитом "{search}"')
 
-        # the search is not a direct link
+        # the search is a link yt-dlp didn't recognize, free text never gets here
         if processed_info.get('extractor', None) == 'generic':
             url = processed_info.get('url')
             if url != search:
@@ -206,40 +283,172 @@ class Song:
         else:
             songs = [processed_info]
 
-        return (Song(requester, song) for song in songs)
+        return [Song(requester, song) for song in songs]
+
+    @classmethod
+    async def related(cls, url: str, limit: int = RELATED_LIMIT) -> typing.List[dict]:
+        """Get metadata of tracks related to a YouTube track from its mix playlist.
 
-    def restart(self) -> None:
-        """Restart the song source to continue playback in loop mode."""
-        self.transformer = discord.PCMVolumeTransformer(
-            discord.FFmpegPCMAudio(self.stream_url, **FFMPEG_OPTIONS),
-            self.volume
+        Returns:
+            typing.List[dict]: Track metadata in the format accepted by the constructor, empty for other sites.
+        """
+        video_id = youtube_video_id(url)
+        if video_id is None:
+            return []
+
+        query = classify_input(f'https://www.youtube.com/watch?v={video_id}&list=RD{video_id}')
+        entries = await run_extraction(
+            cls.ytdl_pool,
+            cls._flat_entries,
+            query.url,
+            limit,
+            ie_key=query.ie_key,
+            extractor=query.extractor,
         )
+        # the mix starts with the track itself, entries without duration are usually live streams
+        return [entry for entry in entries if entry.get('duration') and entry.get('url') != url]
+
+    @staticmethod
+    def _extract_flat(ytdl: yt_dlp.YoutubeDL, url: str, ie_key: str = None) -> dict | None:
+        """Extract a search or a link without resolving streams, the lazy entries are fetched in the executor too."""
+        info = ytdl.extract_info(url, download=False, process=False, ie_key=ie_key)
+        if info is not None and info.get('entries') is not None:
+            info['entries'] = list(info['entries'])
+        return info
+
+    @staticmethod
+    def _flat_entries(ytdl: yt_dlp.YoutubeDL, url: str, limit: int, ie_key: str = None) -> typing.List[dict]:
+        """Extract the first entries of a playlist, the lazy entries are fetched in the executor too."""
+        info = ytdl.extract_info(url, download=False, process=False, ie_key=ie_key)
+        return list(itertools.islice(info.get('entries') or [], limit))
+
+    def restart(self, position: float = None) -> SongSource:
+        """Restart the song source to continue playback in loop mode or to seek.
+
+        Args:
+            position (float, optional): Position in seconds to start from.
+                Defaults to `start_at`, which is reset, so loops start from the beginning.
+
+        Returns:
+            SongSource: The new source, also stored in `transformer`.
+        """
+        if position is None:
+            position = self.start_at
+        self.start_at = 0.0
+
+        gain = loudness_cache.gain(self.url)
+        if gain is None:
+            # not analyzed yet, normalize on the fly until the analysis is done
+            loudness_analyzer.schedule(self.url, self.stream_url)
+            self.gain = 1.0
+            options = dict(FALLBACK_FFMPEG_OPTIONS)
+        else:
+            # the gain is applied by the volume transformer, which runs for every frame anyway
+            self.gain = gain
+            options = dict(FFMPEG_OPTIONS)
+
+        if position > 0:
+            # input side seek, FFmpeg starts the HTTP request near the position instead of reading from the start
+            options['before_options'] = f'-ss {position:.2f} {options["before_options"]}'
+
+        self.transformer = SongSource(
+            discord.FFmpegPCMAudio(self.stream_url, **options),
+            self.volume * self.gain,
+            start=position,
+        )
+        return self.transformer
+
+    @property
+    def position(self) -> float:
+        """Playback position in seconds."""
+        if isinstance(self.transformer, SongSource):
+            return self.transformer.position
+        return self.start_at
+
+    def set_volume(self, volume: float) -> None:
+        """Change the volume, including the song that is playing right now."""
+        self.volume = volume
+        if isinstance(self.transformer, SongSource):
+            self.transformer.volume = volume * self.gain
+
+    async def load_metadata(self) -> bool:
+        """Retrieve the title, uploader and duration of the song without its stream URL, which expires.
+
+        Returns:
+            bool: False if the extraction failed for a reason that may pass, e.g. throttling.
+        """
+        if self.error is not None or self.is_loading or self.is_loaded:
+            return True
+
+        query = classify_input(self.url)
+        try:
+            info = await run_extraction(
+                self.ytdl_pool,
+                yt_dlp.YoutubeDL.extract_info,
+                query.url,
+                download=False,
+                process=False,
+                ie_key=query.ie_key,
+                extractor=query.extractor,
+            )
+        except ExtractionError as e:
+            if e.is_permanent:
+                self.error = f'Не вдалося отримати аудіо за посиланням "{self.url}"'
+            return e.is_permanent
+        if info is not None:
+            self.fill_metadata(info)
+        return True
 
     async def load(self, raise_errors: bool = True) -> None:
         """Retrieve the stream URL of the song."""
 
-        if self.is_loading or self.is_loaded or self.error is not None:
+        if self.error is not None:
+            if raise_errors:
+                raise SongException(self.error)
+            return
+
+        if self.is_loading or self.is_loaded:
             return
 
         self.is_loading = True
 
-        partial = functools.partial(
-            self.ytdl.extract_info,
-            self.url,
-            download=False,
-        )
-        loop = asyncio.get_event_loop()
+        query = classify_input(self.url)
         try:
-            info = await loop.run_in_executor(None, partial)
-        except:
-            self.error = True
+            info = await run_extraction(
+                self.ytdl_pool,
+                yt_dlp.YoutubeDL.extract_info,
+                query.url,
+                download=False,
+                ie_key=query.ie_key,
+                extractor=query.extractor,
+            )
+        except ExtractionError as e:
+            self.is_loading = False
+            if e.is_permanent:
+                # only remember errors caused by the track itself, throttling and network errors may pass
+                self.error = f'Не вдалося отримати аудіо за посиланням "{self.url}"'
             if not raise_errors:
                 return
+            retry_in = e.retry_in if isinstance(e, CircuitOpenError) else 0.0
+            if isinstance(e, CircuitOpenError) or e.kind == ErrorKind.RATE_LIMITED:
+                raise SongException(RATE_LIMITED_MESSAGE, retry_in=retry_in)
             print('Error while loading song:', self.url)
             print(traceback.format_exc())
-            raise SongException(f'Не вдалося отримати аудіо за посиланням "{self.url}"')
+            raise SongException(
+                f'Не вдалося отримати аудіо за посиланням "{self.url}"',
+                retry_in=retry_in if e.kind == ErrorKind.NETWORK else None,
+            )
+        if not info.get('url'):
+            # a playlist or a page without audio, e.g. an imported link
+            self.is_loading = False
+            self.error = f'Не вдалося отримати аудіо за посиланням "{self.url}"'
+            if raise_errors:
+                raise SongException(self.error)
+            return
         self.stream_url = info.get('url')
         self.thumbnail = info.get('thumbnail')
+        # imported songs may lack some metadata
+        self.fill_metadata(info)
 
         # TODO: use lavalink instead of yt-dlp
         # partial = functools.partial(
@@ -329,8 +538,53 @@ class Song:
         return embed
 
 
+class BroadcastSong(Song):
+    """A song that joins a live broadcast shared with other guilds instead of opening its own stream."""
+    # search -> resolved song and the time it was resolved at
+    templates: typing.Dict[str, typing.Tuple[Song, float]] = {}
+
+    @classmethod
+    async def create(cls, search: str, requester: discord.Member, loop: asyncio.BaseEventLoop = None) -> 'BroadcastSong':
+        """Create a song for a broadcast, the search is resolved only once for all guilds.
+
+        Raises:
+            SongException: Raised when can't find song.
+        """
+        template, resolved_at = cls.templates.get(search, (None, 0))
+        expired = time.monotonic() - resolved_at > BROADCAST_URL_TTL
+        if template is None or (expired and not is_live(search)):
+            songs = await Song.create_sources(search=search, requester=requester, loop=loop)
+            template = next(iter(songs), None)
+            if template is None:
+                raise SongException(f'Не вдалося знайти жодного треку за запитом "{search}"')
+            await template.load()
+            cls.templates[search] = (template, time.monotonic())
+
+        song = cls.__new__(cls)
+        song.__dict__.update(template.__dict__)
+        song.key = search
+        song.requester = requester
+        song.skip_votes = set()
+        song.skipped = False
+        song.transformer = None
+        song.trace = None
+        return song
+
+    def restart(self, position: float = None) -> discord.AudioSource:
+        """Subscribe to the broadcast at its live position, starting it if nobody listens yet.
+        Broadcasts are live, so the position is ignored."""
+        broadcast = get_broadcast(self.key, self.stream_url, **BROADCAST_FFMPEG_OPTIONS)
+        self.transformer = broadcast.subscribe()
+        return self.transformer
+
+    @property
+    def position(self) -> float:
+        return 0.0
+
+
 class VoiceClient:
     """Music player instance."""
+    import_semaphore: asyncio.Semaphore | None = None  # limits background extractions of all imports
 
     def __init__(self, bot: commands.Bot, volume: float = DEFAULT_VOLUME):
         self.bot = bot
@@ -344,6 +598,14 @@ class VoiceClient:
         self.volume = volume
         self.removed = False
 
+        self.autoplay = False
+        self.autoplay_requester: discord.Member | None = None
+        self.autoplay_next: Song | None = None  # resolved in the background while the last song plays
+        self.autoplay_task: asyncio.Task | None = None
+        self.autoplay_seed: str | None = None  # history track the prefetched song continues
+        self.history: typing.Deque[dict] = collections.deque(maxlen=HISTORY_LENGTH)
+        self.resolve_tasks: typing.Set[asyncio.Task] = set()
+
         self.audio_player = bot.loop.create_task(self.player_task())
 
     def __del__(self):
@@ -362,41 +624,195 @@ class VoiceClient:
             if not self.loop:
                 try:
                     async with asyncio.timeout(180):  # 3 minutes
-                        self.current = await self.queue.get()
+                        self.current = await self.next_song()
                 except asyncio.TimeoutError:
                     self.bot.loop.create_task(self.stop())
                     return
 
+            trace = self.current.trace
+            if trace is not None:
+                trace.span_since('queue_wait', 'queued')
+
             # load the song if it's not loaded
+            if not await self.load_current():
+                continue
+
+            # ensure that the voice client is connected,
+            # before the restart, which subscribes to a broadcast and starts FFmpeg
+            if not self.voice:
+                self.bot.loop.create_task(self.stop())
+                return
+
+            # update song player
+            if trace is not None:
+                trace.mark('restart')
+            self.current.volume = self.volume
+            self.current.restart()
+
+            # play the song
+            source = self.current.transformer
+            if trace is not None:
+                # only the first playback is traced, loops are not
+                source = TracedSource(source, trace)
+                self.current.trace = None
+            self.voice.play(source, after=self.play_next_song)
+
+            if not isinstance(self.current, BroadcastSong) and (not self.history or self.history[-1]['webpage_url'] != self.current.url):
+                self.history.append(self.current.to_data())
+            seed = self.history[-1]['webpage_url'] if self.history else None
+            if self.autoplay and not self.loop and self.queue.empty() and seed != self.autoplay_seed:
+                # resolve the next track while this one plays, so there is no gap,
+                # loop repeats keep the song already prefetched for the same track
+                self.prefetch_autoplay()
+
+            # wait for the song to end
+            await self.play_next.wait()
+
+    async def load_current(self) -> bool:
+        """Load the current song, waiting out rate limits and network errors instead of skipping the song.
+
+        Returns:
+            bool: Whether the song is ready to play, False if it was skipped or failed to load.
+        """
+        trace = self.current.trace
+        attempt = 0
+        while True:
             try:
                 async with asyncio.timeout(60):
-                    await self.current.load()
-                    while not self.current.is_loaded:
-                        await asyncio.sleep(0.1)
+                    with trace_span(trace, 'load', preloaded=self.current.is_loaded):
+                        await self.current.load()
+                        # the song may be loading in the background by the queue preloader
+                        while self.current.is_loading and not self.current.is_loaded:
+                            await asyncio.sleep(0.1)
+                        if not self.current.is_loaded:
+                            # background loading failed, try again and raise the error
+                            await self.current.load()
                 if self.current.skipped:
-                    continue
+                    if trace is not None:
+                        trace.finish('skipped')
+                    return False
+                return True
             except asyncio.TimeoutError:
                 # song loading took too long, skip it
-                continue
+                if trace is not None:
+                    trace.finish('load_timeout')
+                return False
             except SongException as e:
-                # song failed to load, skip it
                 print(e)
-                continue
+                if e.retry_in is None:
+                    # the song itself can't be played, skip it
+                    if trace is not None:
+                        trace.finish('load_error')
+                    return False
+                retry_in = max(e.retry_in, backoff_delay(attempt, base=1.0, cap=60))
+
+            # keep the song and the queue until the extractor recovers, unless the song is skipped
+            attempt += 1
+            deadline = time.monotonic() + retry_in
+            while time.monotonic() < deadline:
+                if self.current.skipped or self.removed:
+                    if trace is not None:
+                        trace.finish('skipped')
+                    return False
+                await asyncio.sleep(0.5)
 
-            # update song player
-            self.current.restart()
-            self.current.volume = self.volume
+    async def next_song(self) -> Song:
+        """Wait for the next song from the queue or, in autoplay mode, the prefetched one."""
+        if not self.autoplay or not self.queue.empty():
+            return await self.queue.get()
 
-            # ensure that the voice client is connected
-            if not self.voice:
-                self.bot.loop.create_task(self.stop())
+        if self.autoplay_next is None and (self.autoplay_task is None or self.autoplay_task.done()):
+            self.prefetch_autoplay()
+
+        # a song queued by a user wins over the prefetched one
+        get = asyncio.ensure_future(self.queue.get())
+        try:
+            await asyncio.wait({get, self.autoplay_task}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            get.cancel()
+            raise
+        if get.done():
+            return get.result()
+
+        if self.autoplay_next is not None:
+            get.cancel()
+            song, self.autoplay_next = self.autoplay_next, None
+            return song
+        # nothing to continue with, wait for users
+        return await get
+
+    def prefetch_autoplay(self) -> None:
+        """Start resolving a continuation track in the background, replacing the previous one."""
+        if self.autoplay_task is not None and not self.autoplay_task.done():
+            self.autoplay_task.cancel()
+        self.autoplay_next = None
+        self.autoplay_seed = self.history[-1]['webpage_url'] if self.history else None
+        self.autoplay_task = self.bot.loop.create_task(self._prefetch_autoplay())
+
+    async def _prefetch_autoplay(self) -> None:
+        if not self.history:
+            return
+        seed = self.history[-1]
+        requester = self.autoplay_requester or self.current and self.current.requester
+        played = {track['webpage_url'] for track in self.history}
+
+        try:
+            related = await Song.related(seed['webpage_url'])
+        except ExtractionError as e:
+            print('Error while getting related tracks:', seed['webpage_url'], e)
+            related = []
+        candidates = [track for track in related if track.get('url') not in played]
+
+        # fall back to the play history, without the most recent tracks
+        history = list(self.history)[:-HISTORY_NO_REPEAT]
+        random.shuffle(history)
+        candidates += [{**track, 'url': None} for track in history]
+
+        for data in candidates[:5]:
+            try:
+                song = Song(requester, data)
+            except (SongException, TypeError, ValueError):
+                continue
+            await song.load(raise_errors=False)
+            if song.is_loaded:
+                self.autoplay_next = song
                 return
 
-            # play the song
-            self.voice.play(self.current.transformer, after=self.play_next_song)
+    def resolve_in_background(self, songs: typing.List[Song]) -> None:
+        """Resolve imported songs in batches: songs without metadata and the first few streams."""
+        songs = [song for i, song in enumerate(songs) if i < IMPORT_PRELOAD or song.title is None or not song.duration_seconds]
+        if not songs:
+            return
+        task = self.bot.loop.create_task(self._resolve(songs))
+        self.resolve_tasks.add(task)
+        task.add_done_callback(self.resolve_tasks.discard)
+
+    async def _resolve(self, songs: typing.List[Song]) -> None:
+        if VoiceClient.import_semaphore is None:
+            VoiceClient.import_semaphore = asyncio.Semaphore(IMPORT_CONCURRENCY)
+        preload = set(songs[:IMPORT_PRELOAD])
+        failed_batches = 0
+
+        async def resolve(song: Song) -> bool:
+            async with VoiceClient.import_semaphore:
+                if song not in preload:
+                    # streams of the other songs would expire before they play, the queue preloads them
+                    return await song.load_metadata()
+                await song.load(raise_errors=False)
+            return song.is_loaded or song.error is not None
+
+        for start in range(0, len(songs), IMPORT_BATCH_SIZE):
+            if self.removed:
+                return
+            batch = [song for song in songs[start:start + IMPORT_BATCH_SIZE] if not song.skipped]
+            results = await asyncio.gather(*(resolve(song) for song in batch))
 
-            # wait for the song to end
-            await self.play_next.wait()
+            if batch and not any(results):
+                # the extractor is throttling us or unreachable, slow down
+                failed_batches += 1
+                await asyncio.sleep(backoff_delay(failed_batches, cap=60))
+            else:
+                failed_batches = 0
 
     def play_next_song(self, error=None):
         """This function will force player to play next song.
@@ -410,6 +826,11 @@ class VoiceClient:
 
     async def stop(self, disconnect=True):
         self.queue.clear()
+        self.autoplay = False
+        if self.autoplay_task is not None:
+            self.autoplay_task.cancel()
+        for task in self.resolve_tasks:
+            task.cancel()
 
         if self.voice and disconnect:
             await self.voice.disconnect()
@@ -425,6 +846,45 @@ class VoiceClient:
             # stop the current song
             self.voice.stop()
 
+    @property
+    def position(self) -> float:
+        """Playback position of the current song in seconds."""
+        return self.current.position if self.current else 0.0
+
+    def seek(self, position: float) -> bool:
+        """Move the current song to a position in seconds.
+
+        If the song is playing, its source is replaced without stopping the player,
+        otherwise the position is used when the song starts, e.g. to restore a saved position.
+        """
+        if not self.current or isinstance(self.current, BroadcastSong) or not self.current.duration_seconds:
+            # live streams and imported songs that aren't loaded yet have no known length
+            return False
+
+        position = max(0.0, min(position, self.current.duration_seconds - 1))
+        if not self.voice or not self.voice.source or not self.current.is_loaded:
+            self.current.start_at = position
+            return True
+
+        paused = self.voice.is_paused()
+        old_source = self.voice.source
+        self.voice.source = self.current.restart(position)
+        self.bot.loop.create_task(self._cleanup_after_switch(old_source, self.voice.source))
+        if paused:
+            self.voice.pause()
+        return True
+
+    async def _cleanup_after_switch(self, old_source: discord.AudioSource, new_source: SongSource) -> None:
+        """Clean up a replaced source once the player thread has stopped reading it.
+
+        `AudioPlayer.set_source` swaps the source under a lock the player thread doesn't hold while reading,
+        so a read of the old source may still be in progress, and a closed source would return an empty frame
+        and stop the player. The first read of the new source means the old one is no longer used.
+        """
+        while new_source.frames == 0 and self.voice and self.voice.source is new_source:
+            await asyncio.sleep(FRAME_LENGTH)
+        old_source.cleanup()
+
     def reset_player(self) -> None:
         self.audio_player.cancel()
         self.audio_player = self.bot.loop.create_task(self.player_task())
@@ -440,6 +900,27 @@ class MusicCog(commands.Cog):
         self.bot = bot
         self.voice_clients = {}
 
+        # custom_id (before the ":" for buttons with an argument) -> handler
+        self.button_handlers = {
+            'pause': self.pause,
+            'stop': self.stop,
+            'skip': self.skip,
+            'shuffle': self.shuffle,
+            'loop': self.loop,
+            'now': self.now,
+            'queue': self.queue,
+            'clear': self.clear,
+            'play_again': self.play_again,
+            'play_silent_again': functools.partial(self.play_again, silent=True),
+        }
+        self.legacy_button_handlers = {
+            'play_again_': self.play_search_again,
+            'play_silent_again_': functools.partial(self.play_search_again, silent=True),
+        }
+
+        # start extraction threads in the background, the pool is shared by all bots
+        asyncio.get_event_loop().run_in_executor(None, Song.ytdl_pool.warm_up)
+
         @bot.event
         async def on_interaction(interaction: discord.interactions.Interaction) -> None:
             await self.interaction_listener(interaction)
@@ -482,30 +963,46 @@ class MusicCog(commands.Cog):
         if custom_id is None:
             return
 
-        if custom_id == 'pause':
-            await self.pause(interaction)
-        elif custom_id == 'stop':
-            await self.stop(interaction)
-        elif custom_id == 'skip':
-            await self.skip(interaction)
-        elif custom_id == 'shuffle':
-            await self.shuffle(interaction)
-        elif custom_id == 'loop':
-            await self.loop(interaction)
-        elif custom_id == 'now':
-            await self.now(interaction)
-        elif custom_id == 'queue':
-            await self.queue(interaction)
-        elif custom_id == 'clear':
-            await self.clear(interaction)
-
-        elif custom_id.startswith('play_again_'):
-            url = custom_id[11:]
-            await self.play(interaction, url)
-
-        elif custom_id.startswith('play_silent_again_'):
-            url = custom_id[18:]
-            await self.play(interaction, url, silent=True)
+        # buttons with an argument look like "name:argument"
+        name, separator, argument = custom_id.partition(':')
+        handler = self.button_handlers.get(name)
+        args = (argument,) if separator else ()
+
+        if handler is None:
+            for prefix, legacy_handler in self.legacy_button_handlers.items():
+                if custom_id.startswith(prefix):
+                    handler, args = legacy_handler, (custom_id[len(prefix):],)
+                    break
+            else:
+                return
+
+        await handler(interaction, *args)
+
+    async def play_again(self, interaction: discord.Interaction, id: str, silent=False) -> None:
+        """Queue tracks from the registry again, the search is repeated only if the tracks weren't stored."""
+        entry = track_registry.get(id)
+        if entry is None:
+            await smart_send(interaction, content='Ця кнопка застаріла, скористайтеся командою `/play`')
+            return
+
+        if silent and getattr(self.bot, 'broadcast', False):
+            await self.join_broadcast(interaction, entry['search'])
+        elif entry['tracks']:
+            await self.play(interaction, entry['search'], silent=silent, tracks=entry['tracks'])
+        else:
+            await self.play(interaction, entry['search'], silent=silent)
+
+        if silent:
+            await interaction.response.edit_message(content='Let\'s start the party!')
+
+    async def play_search_again(self, interaction: discord.Interaction, search: str, silent=False) -> None:
+        """Handle buttons sent before the track registry, which carry the search itself."""
+        if silent and getattr(self.bot, 'broadcast', False):
+            await self.join_broadcast(interaction, search)
+        else:
+            await self.play(interaction, search, silent=silent)
+
+        if silent:
             await interaction.response.edit_message(content='Let\'s start the party!')
 
     @staticmethod
@@ -526,49 +1023,81 @@ class MusicCog(commands.Cog):
         else:
             voice_client.voice = await destination.connect()
 
-    async def play(self, interaction: discord.Interaction, search: str, silent=False) -> bool:
+    async def play(
+        self,
+        interaction: discord.Interaction,
+        search: str,
+        silent=False,
+        tracks: typing.List[dict] | None = None,
+    ) -> typing.List[Song]:
+        """Search and queue songs.
+
+        Args:
+            search (str): URL or song name.
+            silent (bool, optional): Don't respond to the interaction. Defaults to False.
+            tracks (typing.List[dict], optional): Already resolved tracks of the search, skips searching.
+
+        Returns:
+            typing.List[Song]: Queued songs, empty if nothing was queued.
+        """
+        trace = Trace('play', bot=self.bot.user.name, guild=interaction.guild.id, search=search, silent=silent)
+
         voice_client = self.get_voice_client(interaction)
         if not await self.ensure_voice_state(interaction, voice_client):
-            return False
+            return []
 
         if not voice_client.voice:
             # should set voice_client.voice to a joined voice client
-            await self.join(interaction)
+            with trace.span('join'):
+                await self.join(interaction)
 
         if not voice_client.voice:
             if not silent:
                 await smart_send(interaction, content=f'Не вдалося приєднатися до голосового каналу')
-            return False
+            return []
 
         if not silent:
-            await interaction.response.defer(thinking=True)
+            with trace.span('defer'):
+                await interaction.response.defer(thinking=True)
 
         # get song
         try:
-            songs = await Song.create_sources(search=search, requester=interaction.user, loop=self.bot.loop)
+            with trace.span('create_sources', registry=tracks is not None):
+                if tracks is not None:
+                    songs = [Song(interaction.user, data) for data in tracks]
+                else:
+                    songs = await Song.create_sources(search=search, requester=interaction.user, loop=self.bot.loop)
         except SongException as e:
+            trace.finish('search_error')
             if not silent:
                 await smart_send(interaction, content=str(e))
-            return False
-
-        # count them and add to the queue
-        count = 0
-        for song in songs:
-            await voice_client.queue.add(song)
-            count += 1
+            return []
+
+        # add them to the queue
+        queued = []
+        with trace.span('queue_add'):
+            for song in songs:
+                if not queued:
+                    # time to first audio is measured for the first song only
+                    song.trace = trace
+                    trace.mark('queued')
+                await voice_client.queue.add(song)
+                queued.append(song)
 
         # respond to the user based on the song count
+        count = len(queued)
         if not silent:
             if count == 0:
                 await smart_send(interaction, content='Не вдалося знайти жодного треку')
-            if count > 1:
+            elif count > 1:
                 await smart_send(interaction, content=f'{count} треків додано в чергу')
             else:
-                await smart_send(interaction, content=f'Трек {song} додано в чергу', view=PlayAgainView(song.url))
+                track_id = track_registry.add(song.url, [song.to_data()])
+                await smart_send(interaction, content=f'Трек {song} додано в чергу', view=PlayAgainView(track_id))
 
         if count == 0:
-            return False
-        return True
+            trace.finish('not_found')
+        return queued
 
     async def stop(self, interaction: discord.Interaction) -> None:
         voice_client = self.get_voice_client(interaction)
@@ -630,6 +1159,17 @@ class MusicCog(commands.Cog):
         voice_client.loop = not voice_client.loop
         await smart_send(interaction, content=f'Повторення треку {"ввімкнено ✅" if voice_client.loop else "вимкнено ❌"}')
 
+    async def autoplay(self, interaction: discord.Interaction) -> None:
+        voice_client = self.get_voice_client(interaction)
+        if not await self.ensure_voice_state(interaction, voice_client):
+            return
+
+        voice_client.autoplay = not voice_client.autoplay
+        voice_client.autoplay_requester = interaction.user
+        if voice_client.autoplay and voice_client.current and voice_client.queue.empty():
+            voice_client.prefetch_autoplay()
+        await smart_send(interaction, content=f'Автовідтворення {"ввімкнено ✅" if voice_client.autoplay else "вимкнено ❌"}')
+
     async def now(self, interaction: discord.Interaction) -> None:
         voice_client = self.get_voice_client(interaction)
         if voice_client.current:
@@ -667,7 +1207,7 @@ class MusicCog(commands.Cog):
 
         queue = ''
         for i, song in enumerate(voice_client.queue[start:end], start=start):
-            queue += f'`{i+1}.` [**{song.title}**]({song.url})\n'
+            queue += f'`{i+1}.` [**{song.title or song.url}**]({song.url})\n'
 
         embed = (discord.Embed(description=f'**{len(voice_client.queue)} треків:**\n\n{queue}')
                  .set_footer(text=f'Сторінка {page}/{pages}'))
@@ -680,9 +1220,99 @@ class MusicCog(commands.Cog):
 
         voice_client.volume = volume / 100
         if voice_client.current:
-            voice_client.current.volume = volume / 100
+            voice_client.current.set_volume(volume / 100)
         await smart_send(interaction, content=f'Гучність встановлена на **{volume}%**')
 
+    async def seek(self, interaction: discord.Interaction, position: str) -> None:
+        voice_client = self.get_voice_client(interaction)
+        if not await self.ensure_voice_state(interaction, voice_client):
+            return
+
+        if not voice_client.is_playing:
+            return await smart_send(interaction, content='На даний момент нічого не грає')
+
+        seconds = self.parse_position(position)
+        if seconds is None:
+            return await smart_send(interaction, content='Неправильний формат часу, приклад: `1:23` або `83`')
+
+        if not voice_client.seek(seconds):
+            return await smart_send(interaction, content='Цей трек неможливо перемотати')
+        await smart_send(interaction, content=f'Перемотано на **{self.format_position(voice_client.position)}**')
+
+    @staticmethod
+    def parse_position(position: str) -> int | None:
+        """Parse `83`, `1:23` or `1:02:03` into seconds."""
+        parts = position.strip().split(':')
+        if not 1 <= len(parts) <= 3 or not all(part.isdecimal() for part in parts):
+            return None
+        seconds = 0
+        for part in parts:
+            seconds = seconds * 60 + int(part)
+        return seconds
+
+    @staticmethod
+    def format_position(seconds: float) -> str:
+        minutes, seconds = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
+        if hours:
+            return f'{hours}:{minutes:02}:{seconds:02}'
+        return f'{minutes}:{seconds:02}'
+
+    async def export(self, interaction: discord.Interaction, format: str = 'json') -> None:
+        """Send the current song and the queue as a playlist file."""
+        voice_client = self.get_voice_client(interaction)
+        songs = ([voice_client.current] if voice_client.current else []) + voice_client.queue[:]
+        songs = [song for song in songs if not isinstance(song, BroadcastSong)]
+        if not songs:
+            await smart_send(interaction, content='Черга порожня')
+            return
+
+        tracks = [song.to_data() for song in songs]
+        content = dump_m3u(tracks) if format == 'm3u' else dump_json(tracks)
+        file = discord.File(io.BytesIO(content.encode()), filename=f'queue.{format}')
+        await smart_send(interaction, content=f'Експортовано треків: **{len(tracks)}**', file=file)
+
+    async def import_(self, interaction: discord.Interaction, file: discord.Attachment) -> None:
+        """Queue a playlist file at once, tracks are resolved in the background."""
+        voice_client = self.get_voice_client(interaction)
+        if not await self.ensure_voice_state(interaction, voice_client):
+            return
+
+        if file.size > MAX_IMPORT_SIZE:
+            await smart_send(interaction, content='Файл завеликий')
+            return
+
+        await interaction.response.defer(thinking=True)
+        if not voice_client.voice:
+            await self.join(interaction)
+        if not voice_client.voice:
+            await smart_send(interaction, content='Не вдалося приєднатися до голосового каналу')
+            return
+
+        try:
+            content = (await file.read()).decode('utf-8', errors='ignore')
+            tracks = parse_playlist(content, MAX_IMPORT_TRACKS)
+        except (PlaylistException, discord.HTTPException) as e:
+            await smart_send(interaction, content=str(e) if isinstance(e, PlaylistException) else 'Не вдалося завантажити файл')
+            return
+
+        songs = []
+        for data in tracks:
+            # free text and playlist links would be expanded or searched, not played as one track
+            if not is_single_track(data['webpage_url']):
+                continue
+            try:
+                songs.append(Song(interaction.user, data))
+            except (SongException, TypeError, ValueError):
+                continue
+        if not songs:
+            await smart_send(interaction, content='Не вдалося знайти жодного треку')
+            return
+
+        await voice_client.queue.add(songs)
+        voice_client.resolve_in_background(songs)
+        await smart_send(interaction, content=f'{len(songs)} треків додано в чергу')
+
     async def clear(self, interaction: discord.Interaction) -> None:
         voice_client = self.get_voice_client(interaction)
         if not await self.ensure_voice_state(interaction, voice_client):
@@ -708,11 +1338,76 @@ class MusicCog(commands.Cog):
             return
 
         await interaction.response.defer(thinking=True)
-        success = await self.play(interaction, self.bot.speciality, silent=True)
+        if getattr(self.bot, 'broadcast', False):
+            success = await self.join_broadcast(interaction, self.bot.speciality)
+            tracks = []  # broadcasts are joined by the search
+        else:
+            songs = await self.play(interaction, self.bot.speciality, silent=True)
+            success = bool(songs)
+            tracks = [song.to_data() for song in songs]
         if not success:
             await smart_send(interaction, content='Не вдалося відтворити музику')
             return
-        await smart_send(interaction, content='Let\'s start the party!', view=PlayAgainView(self.bot.speciality, silent=True))
+        track_id = track_registry.add(self.bot.speciality, tracks)
+        await smart_send(interaction, content='Let\'s start the party!', view=PlayAgainView(track_id, silent=True))
+
+    async def join_broadcast(self, interaction: discord.Interaction, search: str) -> bool:
+        """Queue a live broadcast of the search, shared with every guild that plays it."""
+        voice_client = self.get_voice_client(interaction)
+        if not await self.ensure_voice_state(interaction, voice_client):
+            return False
+
+        if not voice_client.voice:
+            await self.join(interaction)
+        if not voice_client.voice:
+            return False
+
+        try:
+            song = await BroadcastSong.create(search, interaction.user, loop=self.bot.loop)
+        except SongException as e:
+            print(e)
+            return False
+
+        await voice_client.queue.add(song)
+        return True
+
+    async def extractors(self, interaction: discord.Interaction) -> None:
+        """Show the state of extractor circuit breakers to admins."""
+        if not is_admin(interaction.user):
+            await smart_send(interaction, content='Ця команда доступна лише адміністраторам', ephemeral=True)
+            return
+
+        report = breaker_report()
+        if not report:
+            await smart_send(interaction, content='Жодних запитів до сервісів ще не було', ephemeral=True)
+            return
+
+        lines = []
+        for name, state in report.items():
+            details = ', '.join(f'{key}: {value}' for key, value in state.items() if key != 'state')
+            lines.append(f'**{name}** - `{state["state"]}` ({details})')
+        for key, state in broadcast_report().items():
+            details = ', '.join(f'{name}: {value}' for name, value in state.items())
+            lines.append(f'Трансляція **{key}** ({details})')
+        await smart_send(interaction, content='\n'.join(lines), ephemeral=True)
+
+    async def latency(self, interaction: discord.Interaction) -> None:
+        """Show time to first audio percentiles of this bot, overall and for this guild."""
+        if not is_admin(interaction.user):
+            await smart_send(interaction, content='Ця команда доступна лише адміністраторам', ephemeral=True)
+            return
+
+        embed = discord.Embed(title='Час до першого звуку', color=discord.Color.blurple())
+        for title, summary in (
+            ('Бот', tracer.summary(bot=self.bot.user.name)),
+            ('Сервер', tracer.summary(bot=self.bot.user.name, guild=interaction.guild.id)),
+        ):
+            lines = [
+                f'`{name}`: ' + ', '.join(f'{key} {value}' + ('' if key == 'count' else ' мс') for key, value in stats.items())
+                for name, stats in summary.items()
+            ]
+            embed.add_field(name=title, value='\n'.join(lines) or 'Немає даних', inline=False)
+        await smart_send(interaction, embed=embed, ephemeral=True)
 
     # define commands
 
@@ -740,6 +1435,10 @@ class MusicCog(commands.Cog):
     async def loop_cmd(self, interaction: discord.Interaction):
         await self.loop(interaction)
 
+    @app_commands.command(name='autoplay', description='Увімкнути/вимкнути автовідтворення схожих треків')
+    async def autoplay_cmd(self, interaction: discord.Interaction):
+        await self.autoplay(interaction)
+
     @app_commands.command(name='now', description='Відобразити назву треку, який зараз відтворюється')
     async def now_cmd(self, interaction: discord.Interaction):
         await self.now(interaction)
@@ -756,6 +1455,18 @@ class MusicCog(commands.Cog):
     async def volume_cmd(self, interaction: discord.Interaction, volume: int):
         await self.volume(interaction, volume)
 
+    @app_commands.command(name='seek', description='Перемотати трек на вказаний час')
+    async def seek_cmd(self, interaction: discord.Interaction, position: str):
+        await self.seek(interaction, position)
+
+    @app_commands.command(name='export', description='Зберегти чергу у файл')
+    async def export_cmd(self, interaction: discord.Interaction, format: typing.Literal['json', 'm3u'] = 'json'):
+        await self.export(interaction, format)
+
+    @app_commands.command(name='import', description='Додати в чергу треки з файлу')
+    async def import_cmd(self, interaction: discord.Interaction, file: discord.Attachment):
+        await self.import_(interaction, file)
+
     @app_commands.command(name='clear', description='Очистити чергу')
     async def clear_cmd(self, interaction: discord.Interaction):
         await self.clear(interaction)
@@ -768,6 +1479,14 @@ class MusicCog(commands.Cog):
     async def perform_cmd(self, interaction: discord.Interaction):
         await self.perform(interaction)
 
+    @app_commands.command(name='latency', description='Статистика затримки відтворення')
+    async def latency_cmd(self, interaction: discord.Interaction):
+        await self.latency(interaction)
+
+    @app_commands.command(name='extractors', description='Стан сервісів пошуку музики')
+    async def extractors_cmd(self, interaction: discord.Interaction):
+        await self.extractors(interaction)
+
 
 class ActionView(discord.ui.View):
     def __init__(self):
@@ -794,9 +1513,9 @@ class ActionView(discord.ui.View):
 
 
 class PlayAgainView(discord.ui.View):
-    def __init__(self, song: str, silent=False):
+    def __init__(self, track_id: str, silent=False):
         super().__init__()
-        custom_id = f'play_again_{song}' if not silent else f'play_silent_again_{song}'
+        custom_id = f'play_again:{track_id}' if not silent else f'play_silent_again:{track_id}'
         self.add_item(
             discord.ui.Button(
                 emoji='🔁',
@@ -0,0 +1,24 @@
+import yt_dlp
+
+from utils.extraction import KNOWN_SITES, SEARCH_EXTRACTORS, ErrorKind, _get_extractor_class, classify_error
+
+
+def test_bot_check_is_rate_limited():
+    for message in (
+        'ERROR: [youtube] abc: Sign in to confirm you\'re not a bot. This helps protect our community.',
+        'ERROR: [youtube] abc: Sign in to confirm you’re not a bot. This helps protect our community.',
+    ):
+        assert classify_error(yt_dlp.utils.DownloadError(message)) == ErrorKind.RATE_LIMITED
+
+
+def test_age_gate_is_unavailable():
+    error = yt_dlp.utils.DownloadError('ERROR: [youtube] abc: Sign in to confirm your age. This video may be inappropriate for some users.')
+    assert classify_error(error) == ErrorKind.UNAVAILABLE
+
+
+def test_extractors_exist():
+    for ie_key, _ in SEARCH_EXTRACTORS.values():
+        assert _get_extractor_class(ie_key) is not None, ie_key
+    for _, ie_keys in KNOWN_SITES.values():
+        for ie_key in ie_keys:
+            assert _get_extractor_class(ie_key) is not None, ie_key
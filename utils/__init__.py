@@ -1,3 +1,5 @@
+import os
+import sys
 from discord import Member
 import discord
 
@@ -5,8 +7,8 @@ import discord
 async def smart_send(interaction: discord.Interaction, *args, **kwargs) -> None:
     """Universal function to send messages to channel or edit original response."""
     # if interaction is a button - send message which will be deleted after 10 seconds
-    # if id starts with play_again_ - treat it as a regular command
-    if interaction.data and interaction.data.get('custom_id') and not interaction.data.get('custom_id').startswith('play_again_'):
+    # if id starts with play_again - treat it as a regular command
+    if interaction.data and interaction.data.get('custom_id') and not interaction.data.get('custom_id').startswith('play_again'):
         await interaction.response.send_message(*args, **kwargs, delete_after=10)
         return
 
@@ -18,3 +20,25 @@ async def smart_send(interaction: discord.Interaction, *args, **kwargs) -> None:
 
 def is_admin(member: Member) -> bool:
     return member.guild_permissions.administrator
+
+
+def env_flag(name: str) -> bool:
+    """Check if an environment variable is set to a truthy value."""
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes', 'y', 'on')
+
+
+def process_rss() -> int:
+    """Get the resident set size of the current process in bytes."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, AttributeError, IndexError, ValueError):
+        pass
+
+    try:
+        import resource  # not available on Windows
+    except ImportError:
+        return 0
+    # peak RSS is reported in bytes on macOS and in kilobytes elsewhere
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
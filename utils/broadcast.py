@@ -0,0 +1,167 @@
+import collections
+import logging
+import threading
+import time
+import typing
+
+import discord
+
+logger = logging.getLogger('broadcast')
+
+FRAME_LENGTH = discord.opus.Encoder.FRAME_LENGTH / 1000  # seconds per frame
+BUFFER_FRAMES = 250  # 5 seconds of audio kept for listeners that fall behind
+PREBUFFER_FRAMES = 5  # new listeners start this many frames behind the live position
+READ_TIMEOUT = 15  # seconds to wait for a stalled stream before ending playback
+
+
+class BroadcastListener(discord.AudioSource):
+    """Audio source of a single voice client subscribed to a broadcast."""
+
+    def __init__(self, broadcast: 'Broadcast', position: int):
+        self.broadcast = broadcast
+        self.position = position  # sequence number of the next frame to send
+
+    def read(self) -> bytes:
+        return self.broadcast.read_frame(self)
+
+    def is_opus(self) -> bool:
+        # frames are already encoded, voice clients send them as is
+        return True
+
+    def cleanup(self) -> None:
+        self.broadcast.unsubscribe(self)
+
+
+class Broadcast:
+    """A single FFmpeg stream, encoded to Opus once and shared by any number of voice clients.
+
+    A reader thread paces the stream in real time and keeps the latest frames in a ring buffer,
+    every listener reads the frames from its own position, so late joiners start at the live position.
+    The stream starts with the first listener and stops when the last one leaves.
+    """
+
+    def __init__(self, key: str, stream_url: str, **ffmpeg_options):
+        self.key = key
+        self.stream_url = stream_url
+        self.ffmpeg_options = ffmpeg_options
+
+        self.frames: typing.Deque[bytes] = collections.deque(maxlen=BUFFER_FRAMES)
+        self.seq = 0  # sequence number of the next frame to be produced
+        self.condition = threading.Condition()
+        self.listeners: typing.Set[BroadcastListener] = set()
+
+        self.started_at: float | None = None
+        self.stopping = False
+        self.finished = False
+        self.thread: threading.Thread | None = None
+
+    @property
+    def is_alive(self) -> bool:
+        return not self.stopping and not self.finished
+
+    @property
+    def position(self) -> float:
+        """Live position of the stream in seconds."""
+        return self.seq * FRAME_LENGTH
+
+    def subscribe(self) -> BroadcastListener:
+        with _lock, self.condition:
+            # the last listener may have just left, keep the stream running
+            self.stopping = False
+
+            oldest = self.seq - len(self.frames)
+            listener = BroadcastListener(self, max(oldest, self.seq - PREBUFFER_FRAMES))
+            self.listeners.add(listener)
+
+            if self.thread is None:
+                self.started_at = time.monotonic()
+                self.thread = threading.Thread(target=self._run, name=f'broadcast:{self.key}', daemon=True)
+                self.thread.start()
+        return listener
+
+    def unsubscribe(self, listener: BroadcastListener) -> None:
+        with _lock, self.condition:
+            self.listeners.discard(listener)
+            if not self.listeners:
+                self.stopping = True
+                self.condition.notify_all()
+
+    def read_frame(self, listener: BroadcastListener) -> bytes:
+        with self.condition:
+            while True:
+                oldest = self.seq - len(self.frames)
+                if listener.position < oldest:
+                    # the listener fell out of the buffer, catch up with the live position
+                    listener.position = max(oldest, self.seq - PREBUFFER_FRAMES)
+
+                if listener.position < self.seq:
+                    frame = self.frames[listener.position - oldest]
+                    listener.position += 1
+                    return frame
+
+                if self.finished or self.stopping:
+                    return b''
+                if not self.condition.wait(timeout=READ_TIMEOUT):
+                    logger.warning(f'Broadcast "{self.key}" stalled, ending playback')
+                    return b''
+
+    def _run(self) -> None:
+        source = discord.FFmpegOpusAudio(self.stream_url, **self.ffmpeg_options)
+        start = time.perf_counter()
+        produced = 0
+        try:
+            while not self.stopping:
+                frame = source.read()
+                if not frame:
+                    break
+
+                with self.condition:
+                    self.frames.append(frame)
+                    self.seq += 1
+                    self.condition.notify_all()
+
+                produced += 1
+                delay = start + produced * FRAME_LENGTH - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+        except Exception:
+            logger.exception(f'Broadcast "{self.key}" failed')
+        finally:
+            source.cleanup()
+            with _lock, self.condition:
+                self.finished = True
+                self.condition.notify_all()
+                if broadcasts.get(self.key) is self:
+                    del broadcasts[self.key]
+            logger.info(f'Broadcast "{self.key}" ended after {self.position:.0f}s')
+
+    def report(self) -> dict:
+        return {
+            'listeners': len(self.listeners),
+            'position': round(self.position),
+            'uptime': round(time.monotonic() - self.started_at) if self.started_at else 0,
+        }
+
+
+_lock = threading.Lock()
+broadcasts: typing.Dict[str, Broadcast] = {}
+
+
+def get_broadcast(key: str, stream_url: str, **ffmpeg_options) -> Broadcast:
+    """Get a live broadcast by key or create a new one from the stream URL."""
+    with _lock:
+        broadcast = broadcasts.get(key)
+        if broadcast is None or not broadcast.is_alive:
+            broadcast = broadcasts[key] = Broadcast(key, stream_url, **ffmpeg_options)
+        return broadcast
+
+
+def is_live(key: str) -> bool:
+    with _lock:
+        broadcast = broadcasts.get(key)
+        return broadcast is not None and broadcast.is_alive and broadcast.thread is not None
+
+
+def broadcast_report() -> typing.Dict[str, dict]:
+    with _lock:
+        return {key: broadcast.report() for key, broadcast in broadcasts.items()}
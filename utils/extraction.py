@@ -0,0 +1,514 @@
+import asyncio
+import concurrent.futures
+import enum
+import functools
+import logging
+import os
+import random
+import re
+import socket
+import threading
+import time
+import typing
+import urllib.error
+import urllib.parse
+
+import yt_dlp
+
+logger = logging.getLogger('extraction')
+
+MAX_ATTEMPTS = 4
+BACKOFF_BASE = 0.5  # seconds
+BACKOFF_CAP = 8.0  # seconds
+
+FAILURE_THRESHOLD = 5  # consecutive network failures before the circuit opens
+RECOVERY_TIMEOUT = 30.0  # seconds before an open circuit lets a probe through
+RECOVERY_TIMEOUT_CAP = 600.0  # seconds
+
+SEARCH_PREFIX = os.environ.get('SEARCH_PREFIX') or 'ytsearch1:'  # used for free text queries
+
+EXTRACTION_WORKERS = int(os.environ.get('EXTRACTION_WORKERS') or 4)  # concurrent extractions per process
+YTDL_MAX_USES = 200  # extractions before a YoutubeDL instance is recreated to cap memory growth
+YTDL_MAX_AGE = 60 * 60  # seconds
+WARM_UP_EXTRACTORS = ('Youtube', 'YoutubeTab', 'YoutubeSearch', 'Generic')
+
+RATE_LIMIT_MESSAGES = (
+    'http error 429',
+    'too many requests',
+    'rate limit',
+    'rate-limit',
+    # only the bot check, "sign in to confirm your age" is an age gate of a single track
+    'confirm you\'re not a bot',
+    'confirm you’re not a bot',
+)
+UNAVAILABLE_MESSAGES = (
+    'video unavailable',
+    'is not available',
+    'private video',
+    'has been removed',
+    'copyright',
+    'members-only',
+    'age-restricted',
+    'sign in to confirm your age',
+    'unsupported url',
+    'does not exist',
+    'http error 404',
+    'http error 410',
+)
+NETWORK_MESSAGES = (
+    'timed out',
+    'connection reset',
+    'connection refused',
+    'connection aborted',
+    'temporary failure in name resolution',
+    'name or service not known',
+    'network is unreachable',
+    'remote end closed connection',
+    'http error 5',
+)
+
+
+class ErrorKind(enum.Enum):
+    RATE_LIMITED = 'rate_limited'  # the site is throttling us, retrying soon makes it worse
+    UNAVAILABLE = 'unavailable'  # the track itself can't be played, retrying won't help
+    NETWORK = 'network'  # transient network problem, worth retrying
+    UNKNOWN = 'unknown'
+
+
+class ExtractionError(Exception):
+    """Raised when extraction fails after all retries or is rejected by an open circuit."""
+
+    def __init__(self, kind: ErrorKind, message: str, extractor: str):
+        super().__init__(message)
+        self.kind = kind
+        self.extractor = extractor
+
+    @property
+    def is_permanent(self) -> bool:
+        return self.kind == ErrorKind.UNAVAILABLE
+
+
+class CircuitOpenError(ExtractionError):
+    """Raised without calling the extractor while its circuit is open."""
+
+    def __init__(self, extractor: str, retry_in: float):
+        super().__init__(
+            ErrorKind.RATE_LIMITED,
+            f'Circuit for "{extractor}" is open, retry in {retry_in:.0f}s',
+            extractor,
+        )
+        self.retry_in = retry_in
+
+
+def _error_chain(error: BaseException) -> typing.List[BaseException]:
+    """Unwrap yt-dlp's DownloadError and chained exceptions."""
+    chain = []
+    seen = set()
+    while error is not None and id(error) not in seen:
+        chain.append(error)
+        seen.add(id(error))
+        exc_info = getattr(error, 'exc_info', None)
+        if exc_info and exc_info[1] is not None:
+            error = exc_info[1]
+        else:
+            error = error.__cause__ or error.__context__
+    return chain
+
+
+def classify_error(error: BaseException) -> ErrorKind:
+    """Decide whether an extraction error is worth retrying."""
+    chain = _error_chain(error)
+
+    for cause in chain:
+        status = getattr(cause, 'status', None) or getattr(cause, 'code', None)
+        if status == 429:
+            return ErrorKind.RATE_LIMITED
+        if isinstance(cause, (yt_dlp.utils.GeoRestrictedError, yt_dlp.utils.UnsupportedError)):
+            return ErrorKind.UNAVAILABLE
+        if isinstance(status, int) and status in (403, 404, 410):
+            return ErrorKind.UNAVAILABLE
+        if isinstance(cause, (TimeoutError, ConnectionError, socket.timeout, urllib.error.URLError)):
+            return ErrorKind.NETWORK
+
+    message = ' '.join(str(cause) for cause in chain).lower()
+    if any(pattern in message for pattern in RATE_LIMIT_MESSAGES):
+        return ErrorKind.RATE_LIMITED
+    if any(pattern in message for pattern in UNAVAILABLE_MESSAGES):
+        return ErrorKind.UNAVAILABLE
+    if any(pattern in message for pattern in NETWORK_MESSAGES):
+        return ErrorKind.NETWORK
+    return ErrorKind.UNKNOWN
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_CAP) -> float:
+    """Exponential backoff with full jitter, so retries from many guilds don't line up."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class CircuitBreaker:
+    """Per-extractor circuit breaker.
+
+    Closed - calls go through, consecutive network failures are counted,
+    a rate limit response opens the circuit right away. Unknown errors are not counted,
+    as they are usually caused by a single track.
+    Open - calls fail immediately until the recovery timeout passes.
+    Half open - a single probe call is let through; success closes the circuit,
+    failure opens it again with a doubled recovery timeout.
+    """
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, name: str, failure_threshold: int = FAILURE_THRESHOLD, recovery_timeout: float = RECOVERY_TIMEOUT):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.base_recovery_timeout = recovery_timeout
+        self.recovery_timeout = recovery_timeout
+
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.last_error: ErrorKind | None = None
+
+        # counters for operators
+        self.total_calls = 0
+        self.total_failures = 0
+        self.total_rejected = 0
+
+    def retry_in(self) -> float:
+        return max(0.0, self.opened_at + self.recovery_timeout - time.monotonic())
+
+    def allow(self) -> None:
+        """Check if a call may go through, raise CircuitOpenError otherwise."""
+        if self.state == self.OPEN:
+            if self.retry_in() > 0:
+                self.total_rejected += 1
+                raise CircuitOpenError(self.name, self.retry_in())
+            self._set_state(self.HALF_OPEN)
+
+        if self.state == self.HALF_OPEN:
+            if self.probing:
+                self.total_rejected += 1
+                raise CircuitOpenError(self.name, self.recovery_timeout)
+            self.probing = True
+
+        self.total_calls += 1
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.probing = False
+        if self.state != self.CLOSED:
+            self.recovery_timeout = self.base_recovery_timeout
+            self._set_state(self.CLOSED)
+
+    def record_failure(self, kind: ErrorKind) -> None:
+        self.total_failures += 1
+        self.last_error = kind
+
+        if kind == ErrorKind.UNAVAILABLE:
+            # the site answered, only the track is broken
+            self.record_success()
+            return
+
+        if kind == ErrorKind.UNKNOWN:
+            # usually caused by the track, not the site: don't count it, but let another call probe
+            self.probing = False
+            return
+
+        self.failures += 1
+        if self.state == self.HALF_OPEN:
+            self.probing = False
+            self.recovery_timeout = min(self.recovery_timeout * 2, RECOVERY_TIMEOUT_CAP)
+            self._open()
+        elif self.state == self.CLOSED and (kind == ErrorKind.RATE_LIMITED or self.failures >= self.failure_threshold):
+            self._open()
+
+    def release(self) -> None:
+        """Forget a call that ended without a result (e.g. was cancelled), so it doesn't block probing."""
+        self.probing = False
+
+    def _open(self) -> None:
+        self.opened_at = time.monotonic()
+        self._set_state(self.OPEN)
+
+    def _set_state(self, state: str) -> None:
+        if state == self.state:
+            return
+        log = logger.warning if state == self.OPEN else logger.info
+        log(f'Circuit for "{self.name}": {self.state} -> {state} (last error: {self.last_error and self.last_error.value})')
+        self.state = state
+
+    def report(self) -> dict:
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'retry_in': round(self.retry_in(), 1) if self.state == self.OPEN else 0,
+            'last_error': self.last_error and self.last_error.value,
+            'calls': self.total_calls,
+            'total_failures': self.total_failures,
+            'rejected': self.total_rejected,
+        }
+
+
+breakers: typing.Dict[str, CircuitBreaker] = {}
+
+
+def get_breaker(extractor: str) -> CircuitBreaker:
+    breaker = breakers.get(extractor)
+    if breaker is None:
+        breaker = breakers[extractor] = CircuitBreaker(extractor)
+    return breaker
+
+
+class Query(typing.NamedTuple):
+    kind: str  # one of SEARCH, KNOWN_URL, URL
+    url: str  # what to pass to `YoutubeDL.extract_info`
+    ie_key: str | None  # extractor to use directly, None to let yt-dlp pick one
+    extractor: str  # circuit breaker name
+
+    SEARCH = 'search'
+    KNOWN_URL = 'known_url'
+    URL = 'url'
+
+
+# like yt-dlp's "auto" search: a link has a scheme or a host followed by a slash, "Mr.Brightside" is a search
+URL_RE = re.compile(r'^([a-z][a-z0-9+.-]*://\S+|[^\s/]+\.[^\s/]+/\S*)$', re.IGNORECASE)
+SEARCH_PREFIX_RE = re.compile(r'^([a-z]+?search(?:date)?)(\d+|all)?:', re.IGNORECASE)
+
+# site name -> hosts and extractors to try, in order, the first one extracts single tracks
+KNOWN_SITES = {
+    'youtube': (
+        ('youtube.com', 'youtu.be', 'youtube-nocookie.com'),
+        ('Youtube', 'YoutubeTab'),
+    ),
+    'soundcloud': (
+        ('soundcloud.com', 'on.soundcloud.com'),
+        ('Soundcloud', 'SoundcloudSet', 'SoundcloudPlaylist', 'SoundcloudUser'),
+    ),
+    'bandcamp': (
+        ('bandcamp.com',),
+        ('Bandcamp', 'BandcampAlbum'),
+    ),
+}
+# search prefix -> search extractor and site, queries with other prefixes are searched as text
+SEARCH_EXTRACTORS = {
+    'ytsearch': ('YoutubeSearch', 'youtube'),
+    'scsearch': ('SoundcloudSearch', 'soundcloud'),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _get_extractor_class(ie_key: str):
+    try:
+        return yt_dlp.extractor.get_info_extractor(ie_key)
+    except Exception:
+        return None
+
+
+def _site_for_host(host: str) -> str | None:
+    for site, (hosts, _) in KNOWN_SITES.items():
+        if any(host == known or host.endswith('.' + known) for known in hosts):
+            return site
+    return None
+
+
+def _search_extractor(prefix: str) -> typing.Tuple[str | None, str]:
+    """Search extractor and site of a search prefix, the extractor is None if yt-dlp should pick it."""
+    ie_key, site = SEARCH_EXTRACTORS.get(prefix.lower(), (None, 'search'))
+    if ie_key is not None and _get_extractor_class(ie_key) is None:
+        # removed or renamed in this yt-dlp version
+        ie_key = None
+    return ie_key, site
+
+
+@functools.lru_cache(maxsize=1024)
+def classify_input(search: str, search_prefix: str = None) -> Query:
+    """Decide locally how to extract a `/play` query, without asking yt-dlp.
+
+    Free text goes straight to the search extractor instead of the generic one,
+    which would only return a search URL and cost another round trip.
+    URLs of known sites go straight to the matching extractor,
+    other URLs are left to yt-dlp.
+    """
+    search = search.strip()
+    search_prefix = search_prefix or SEARCH_PREFIX
+
+    # the query already has a search prefix, e.g. "scsearch5:song"
+    match = SEARCH_PREFIX_RE.match(search)
+    if match and match.group(1).lower() in SEARCH_EXTRACTORS:
+        ie_key, site = _search_extractor(match.group(1))
+        return Query(Query.SEARCH, search, ie_key, site)
+
+    if ' ' in search or not URL_RE.match(search):
+        match = SEARCH_PREFIX_RE.match(search_prefix)
+        ie_key, site = _search_extractor(match.group(1)) if match else (None, 'search')
+        return Query(Query.SEARCH, f'{search_prefix}{search}', ie_key, site)
+
+    url = search if '://' in search else f'https://{search}'
+    host = (urllib.parse.urlparse(url).hostname or '').lower()
+    site = _site_for_host(host)
+    if site is None:
+        return Query(Query.URL, url, None, host.removeprefix('www.'))
+
+    for ie_key in KNOWN_SITES[site][1]:
+        ie = _get_extractor_class(ie_key)
+        if ie is not None and ie.suitable(url):
+            return Query(Query.KNOWN_URL, url, ie_key, site)
+    return Query(Query.URL, url, None, site)
+
+
+def youtube_video_id(url: str) -> str | None:
+    """Get the video ID from a YouTube link."""
+    parsed = urllib.parse.urlparse(url)
+    host = (parsed.hostname or '').lower()
+    if host == 'youtu.be':
+        return parsed.path.lstrip('/').split('/')[0] or None
+    if _site_for_host(host) != 'youtube':
+        return None
+    if parsed.path.startswith(('/shorts/', '/live/')):
+        return parsed.path.split('/')[2] or None
+    return urllib.parse.parse_qs(parsed.query).get('v', [None])[0]
+
+
+def is_single_track(url: str) -> bool:
+    """Check that a link isn't a search or a known playlist, links of other sites are checked when they are loaded."""
+    query = classify_input(url)
+    if query.kind == Query.SEARCH:
+        return False
+    if query.kind == Query.KNOWN_URL:
+        return query.ie_key == KNOWN_SITES[query.extractor][1][0]
+    return True
+
+
+def breaker_report() -> typing.Dict[str, dict]:
+    return {name: breaker.report() for name, breaker in breakers.items()}
+
+
+class YoutubeDLPool:
+    """Extraction thread pool, every thread keeps its own YoutubeDL instance.
+
+    YoutubeDL and its extractors keep mutable state, so instances are not shared between threads.
+    Instances are created and their common extractors initialized when the pool warms up,
+    and recreated after a number of uses or some time to cap memory growth.
+    """
+
+    def __init__(
+        self,
+        options: dict,
+        workers: int = EXTRACTION_WORKERS,
+        max_uses: int = YTDL_MAX_USES,
+        max_age: float = YTDL_MAX_AGE,
+        warm_up_extractors: typing.Iterable[str] = WARM_UP_EXTRACTORS,
+    ):
+        self.options = options
+        self.workers = workers
+        self.max_uses = max_uses
+        self.max_age = max_age
+        self.warm_up_extractors = tuple(warm_up_extractors)
+
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=workers,
+            thread_name_prefix='ytdl',
+            initializer=self._init_thread,
+        )
+        self.local = threading.local()
+        self.recycled = 0
+        self._warmed_up = False
+        self._lock = threading.Lock()
+
+    def _create(self) -> yt_dlp.YoutubeDL:
+        ytdl = yt_dlp.YoutubeDL(self.options)
+        for ie_key in self.warm_up_extractors:
+            try:
+                ytdl.get_info_extractor(ie_key)
+            except Exception as e:
+                logger.debug(f'Failed to warm up extractor "{ie_key}": {e}')
+        return ytdl
+
+    def _init_thread(self) -> None:
+        self.local.ytdl = self._create()
+        self.local.uses = 0
+        self.local.created_at = time.monotonic()
+
+    def _call(self, func: typing.Callable, args: tuple, kwargs: dict):
+        local = self.local
+        if local.uses >= self.max_uses or time.monotonic() - local.created_at > self.max_age:
+            old = local.ytdl
+            self._init_thread()
+            if hasattr(old, 'close'):
+                old.close()
+            with self._lock:
+                self.recycled += 1
+        local.uses += 1
+        return func(local.ytdl, *args, **kwargs)
+
+    def warm_up(self) -> None:
+        """Start every thread of the pool, so instances aren't created in the middle of requests."""
+        with self._lock:
+            if self._warmed_up:
+                return
+            self._warmed_up = True
+
+        # threads are started lazily, keep them all busy at once to start all of them
+        barrier = threading.Barrier(self.workers)
+        futures = [self.executor.submit(barrier.wait, 30) for _ in range(self.workers)]
+        concurrent.futures.wait(futures)
+        logger.info(f'Started {self.workers} extraction threads')
+
+    async def run(self, func: typing.Callable, *args, loop: asyncio.AbstractEventLoop = None, **kwargs):
+        """Run `func(ytdl, *args, **kwargs)` in the pool with the thread's YoutubeDL instance."""
+        loop = loop or asyncio.get_event_loop()
+        return await loop.run_in_executor(self.executor, self._call, func, args, kwargs)
+
+
+async def run_extraction(
+    pool: YoutubeDLPool,
+    func: typing.Callable,
+    *args,
+    extractor: str,
+    loop: asyncio.AbstractEventLoop = None,
+    max_attempts: int = MAX_ATTEMPTS,
+    **kwargs,
+):
+    """Run a blocking extraction call in the pool with retries and a circuit breaker.
+
+    Args:
+        pool (YoutubeDLPool): Pool to run the call in.
+        func (typing.Callable): Blocking function taking a YoutubeDL instance, usually `YoutubeDL.extract_info`.
+        extractor (str): Name of the circuit breaker to use.
+        loop (asyncio.AbstractEventLoop, optional): Event loop to use. Defaults to None.
+        max_attempts (int, optional): Maximum number of calls. Defaults to MAX_ATTEMPTS.
+
+    Raises:
+        ExtractionError: Raised when the error isn't retryable or all attempts failed.
+        CircuitOpenError: Raised when the extractor's circuit is open.
+    """
+    loop = loop or asyncio.get_event_loop()
+    breaker = get_breaker(extractor)
+
+    attempt = 0
+    while True:
+        breaker.allow()
+        try:
+            result = await pool.run(func, *args, loop=loop, **kwargs)
+        except asyncio.CancelledError:
+            breaker.release()
+            raise
+        except Exception as e:
+            kind = classify_error(e)
+            breaker.record_failure(kind)
+            attempt += 1
+
+            if kind == ErrorKind.UNAVAILABLE or attempt >= max_attempts or breaker.state != CircuitBreaker.CLOSED:
+                raise ExtractionError(kind, str(e), extractor) from e
+            if kind == ErrorKind.UNKNOWN and attempt >= 2:
+                # unknown errors are usually not transient, don't waste more calls on them
+                raise ExtractionError(kind, str(e), extractor) from e
+
+            delay = backoff_delay(attempt)
+            logger.debug(f'Extraction with "{extractor}" failed ({kind.value}), retry {attempt} in {delay:.2f}s')
+            await asyncio.sleep(delay)
+        else:
+            breaker.record_success()
+            return result
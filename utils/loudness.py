@@ -0,0 +1,111 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import typing
+
+from utils.storage import JsonFile
+
+logger = logging.getLogger('loudness')
+
+LOUDNESS_CACHE = os.environ.get('LOUDNESS_CACHE') or 'loudness.json'
+TARGET_LOUDNESS = -14.0  # LUFS, about what YouTube normalizes to, so DEFAULT_VOLUME keeps its meaning
+MIN_GAIN = 0.25
+MAX_GAIN = 3.0
+ANALYSIS_WORKERS = 1  # concurrent FFmpeg analyses per process
+ANALYSIS_DURATION = 15 * 60  # seconds, long mixes are measured by their beginning
+ANALYSIS_TIMEOUT = 5 * 60  # seconds
+ANALYSIS_BEFORE_OPTIONS = ['-reconnect', '1', '-reconnect_streamed', '1', '-reconnect_delay_max', '10']
+
+
+class LoudnessCache:
+    """Persistent integrated loudness of tracks, keyed by the track URL."""
+
+    def __init__(self, path: str = LOUDNESS_CACHE):
+        self.file = JsonFile(path)
+        self.entries: typing.Dict[str, dict] = self.file.load(default={})
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.entries
+
+    def gain(self, url: str) -> float | None:
+        """Volume multiplier that brings the track to the target loudness, None if it wasn't analyzed yet."""
+        entry = self.entries.get(url)
+        if entry is None:
+            return None
+        gain = 10 ** ((TARGET_LOUDNESS - entry['lufs']) / 20)
+        return min(MAX_GAIN, max(MIN_GAIN, gain))
+
+    def set(self, url: str, lufs: float) -> None:
+        self.entries[url] = {'lufs': lufs, 'analyzed_at': int(time.time())}
+        self.file.schedule_save(lambda: self.entries)
+
+
+class LoudnessAnalyzer:
+    """Measures integrated loudness (EBU R128) of tracks in the background, once per track."""
+
+    def __init__(self, cache: LoudnessCache, workers: int = ANALYSIS_WORKERS):
+        self.cache = cache
+        self.workers = workers
+        self._semaphore: asyncio.Semaphore | None = None
+        self.pending: typing.Set[str] = set()
+        self.tasks: typing.Set[asyncio.Task] = set()
+
+    def schedule(self, url: str, stream_url: str) -> None:
+        """Queue a track for analysis unless it's cached or already queued."""
+        if not url or not stream_url or url in self.cache or url in self.pending:
+            return
+        self.pending.add(url)
+        task = asyncio.get_event_loop().create_task(self._analyze(url, stream_url))
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def _analyze(self, url: str, stream_url: str) -> None:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.workers)
+        try:
+            async with self._semaphore:
+                lufs = await measure_loudness(stream_url)
+            if lufs is not None:
+                self.cache.set(url, lufs)
+        except Exception as e:
+            logger.warning(f'Failed to analyze loudness of "{url}": {e}')
+        finally:
+            self.pending.discard(url)
+
+
+async def measure_loudness(stream_url: str) -> float | None:
+    """Run FFmpeg's loudnorm filter in analysis mode and return the integrated loudness in LUFS."""
+    process = await asyncio.create_subprocess_exec(
+        'ffmpeg', '-hide_banner', '-nostats',
+        *ANALYSIS_BEFORE_OPTIONS,
+        '-i', stream_url,
+        '-t', str(ANALYSIS_DURATION),
+        '-vn', '-sn', '-dn',
+        '-af', 'loudnorm=print_format=json',
+        '-f', 'null', '-',
+        stdin=asyncio.subprocess.DEVNULL,
+        stdout=asyncio.subprocess.DEVNULL,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        async with asyncio.timeout(ANALYSIS_TIMEOUT):
+            _, stderr = await process.communicate()
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return None
+
+    output = stderr.decode(errors='ignore')
+    start, end = output.rfind('{'), output.rfind('}')
+    if process.returncode != 0 or start == -1 or end < start:
+        return None
+    lufs = float(json.loads(output[start:end + 1])['input_i'])
+    if lufs == float('-inf') or lufs < -70:
+        return None  # silence, leave the volume as is
+    return lufs
+
+
+cache = LoudnessCache()
+analyzer = LoudnessAnalyzer(cache)
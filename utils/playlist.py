@@ -0,0 +1,100 @@
+import json
+import re
+import typing
+
+PLAYLIST_VERSION = 1
+EXTINF_RE = re.compile(r'^#EXTINF:\s*(-?\d+(?:\.\d+)?)[^,]*,(.*)$')
+# metadata kept in exported playlists, stream URLs expire and are not exported
+TRACK_FIELDS = ('title', 'uploader', 'uploader_url', 'duration', 'thumbnail', 'webpage_url')
+
+
+class PlaylistException(Exception):
+    """Raised when an imported playlist can't be parsed."""
+
+
+def dump_json(tracks: typing.Iterable[dict]) -> str:
+    """Dump track metadata (as returned by `Song.to_data`) into a compact JSON playlist."""
+    return json.dumps(
+        {
+            'version': PLAYLIST_VERSION,
+            'tracks': [{key: track[key] for key in TRACK_FIELDS if track.get(key) is not None} for track in tracks],
+        },
+        ensure_ascii=False,
+        separators=(',', ':'),
+    )
+
+
+def dump_m3u(tracks: typing.Iterable[dict]) -> str:
+    lines = ['#EXTM3U']
+    for track in tracks:
+        name = f'{track["uploader"]} - {track["title"]}' if track.get('uploader') else track.get('title') or ''
+        lines.append(f'#EXTINF:{track.get("duration") or -1},{name}')
+        lines.append(track['webpage_url'])
+    return '\n'.join(lines) + '\n'
+
+
+def parse_playlist(content: str, max_tracks: int) -> typing.List[dict]:
+    """Parse a JSON or M3U playlist into track metadata accepted by `Song`.
+
+    Tracks without known metadata get no title and zero duration, they are filled in when the track is loaded.
+
+    Raises:
+        PlaylistException: Raised when the playlist is empty or broken.
+    """
+    content = content.lstrip('﻿').strip()
+    if content.startswith('{'):
+        tracks = _parse_json(content)
+    else:
+        tracks = _parse_m3u(content)
+
+    if not tracks:
+        raise PlaylistException('Плейлист порожній')
+    return tracks[:max_tracks]
+
+
+def _parse_json(content: str) -> typing.List[dict]:
+    try:
+        data = json.loads(content)
+    except ValueError:
+        raise PlaylistException('Не вдалося прочитати JSON плейлист')
+    if not isinstance(data, dict) or not isinstance(data.get('tracks', []), list):
+        raise PlaylistException('Не вдалося прочитати JSON плейлист')
+
+    tracks = []
+    for track in data.get('tracks') or []:
+        if not isinstance(track, dict) or not isinstance(track.get('webpage_url'), str) or not track['webpage_url']:
+            continue
+        tracks.append({
+            **{key: track.get(key) for key in TRACK_FIELDS},
+            'duration': _duration(track.get('duration')),
+        })
+    return tracks
+
+
+def _parse_m3u(content: str) -> typing.List[dict]:
+    tracks = []
+    info = None
+    for line in content.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        if match := EXTINF_RE.match(line):
+            info = match
+            continue
+        if line.startswith('#'):
+            continue
+
+        tracks.append({
+            'title': info.group(2).strip() or None if info else None,
+            'duration': _duration(info.group(1)) if info else 0,
+            'webpage_url': line,
+        })
+        info = None
+    return tracks
+
+
+def _duration(value) -> int:
+    try:
+        return max(0, int(float(value)))
+    except (TypeError, ValueError):
+        return 0
@@ -0,0 +1,52 @@
+import asyncio
+import json
+import logging
+import os
+import typing
+
+logger = logging.getLogger('storage')
+
+SAVE_DELAY = 1  # seconds, changes made in the meantime are saved together
+
+
+class JsonFile:
+    """A JSON file that is read once and written in the background."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._save_task: asyncio.Task | None = None
+        self._dirty = False
+
+    def load(self, default: typing.Any = None) -> typing.Any:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            logger.warning(f'Failed to read "{self.path}": {e}')
+        return default
+
+    def schedule_save(self, get_data: typing.Callable[[], typing.Any]) -> None:
+        """Write the file in the executor, coalescing saves that happen while one is pending."""
+        self._dirty = True
+        if self._save_task is not None and not self._save_task.done():
+            return
+        loop = asyncio.get_event_loop()
+        self._save_task = loop.create_task(self._save(loop, get_data))
+
+    async def _save(self, loop: asyncio.AbstractEventLoop, get_data: typing.Callable[[], typing.Any]) -> None:
+        while self._dirty:
+            await asyncio.sleep(SAVE_DELAY)
+            self._dirty = False
+            data = json.dumps(get_data(), ensure_ascii=False)
+            try:
+                await loop.run_in_executor(None, self._write, data)
+            except OSError as e:
+                logger.warning(f'Failed to save "{self.path}": {e}')
+
+    def _write(self, data: str) -> None:
+        tmp = f'{self.path}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write(data)
+        os.replace(tmp, self.path)
@@ -0,0 +1,247 @@
+import collections
+import contextlib
+import json
+import logging
+import math
+import os
+import queue
+import threading
+import time
+import typing
+import urllib.request
+
+import discord
+
+logger = logging.getLogger('tracing')
+
+TRACE_FILE = os.environ.get('TRACE_FILE')  # JSON lines file, one trace per line
+TRACE_ENDPOINT = os.environ.get('TRACE_ENDPOINT')  # OTLP/HTTP collector, e.g. http://localhost:4318/v1/traces
+SAMPLES_PER_KEY = 500  # recent durations kept per bot/guild for percentiles
+PERCENTILES = (50, 90, 99)
+
+
+class Trace:
+    """Timeline of a single `/play` request, from the interaction to the first voice packet.
+
+    Spans can be recorded from the event loop and from the audio player thread.
+    """
+
+    def __init__(self, name: str, bot: str, guild: int, **attributes):
+        self.trace_id = os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.name = name
+        self.bot = bot
+        self.guild = guild
+        self.attributes = attributes
+
+        self.start = time.time_ns()
+        self.end: int | None = None
+        self.status = None
+        self.spans: typing.List[dict] = []
+        self.marks: typing.Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.end is not None
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes):
+        start = time.time_ns()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.time_ns(), **attributes)
+
+    def add_span(self, name: str, start: int, end: int, **attributes) -> None:
+        self.spans.append({'name': name, 'start': start, 'end': end, 'attributes': attributes})
+
+    def mark(self, name: str) -> None:
+        """Remember a point in time to close a span from another place later."""
+        self.marks[name] = time.time_ns()
+
+    def span_since(self, name: str, mark: str, **attributes) -> None:
+        if mark in self.marks:
+            self.add_span(name, self.marks[mark], time.time_ns(), **attributes)
+
+    def finish(self, status: str = 'ok') -> None:
+        with self._lock:
+            if self.finished:
+                return
+            self.end = time.time_ns()
+            self.status = status
+        tracer.record(self)
+
+    def to_dict(self) -> dict:
+        return {
+            'trace_id': self.trace_id,
+            'name': self.name,
+            'bot': self.bot,
+            'guild': self.guild,
+            'status': self.status,
+            'start': self.start,
+            'total_ms': (self.end - self.start) / 1e6,
+            'attributes': self.attributes,
+            'spans': [
+                {
+                    'name': span['name'],
+                    'start': span['start'],
+                    'duration_ms': (span['end'] - span['start']) / 1e6,
+                    'attributes': span['attributes'],
+                }
+                for span in self.spans
+            ],
+        }
+
+    def to_otlp(self) -> dict:
+        """Convert the trace to OTLP/JSON, the root span covers the whole request."""
+        def attributes(values: dict) -> list:
+            return [{'key': key, 'value': {'stringValue': str(value)}} for key, value in values.items()]
+
+        root = {
+            'traceId': self.trace_id,
+            'spanId': self.span_id,
+            'name': self.name,
+            'kind': 2,  # server
+            'startTimeUnixNano': str(self.start),
+            'endTimeUnixNano': str(self.end),
+            'attributes': attributes({'bot': self.bot, 'guild': self.guild, **self.attributes}),
+            'status': {'code': 1 if self.status == 'ok' else 2, 'message': self.status},
+        }
+        spans = [root] + [
+            {
+                'traceId': self.trace_id,
+                'spanId': os.urandom(8).hex(),
+                'parentSpanId': self.span_id,
+                'name': span['name'],
+                'kind': 1,  # internal
+                'startTimeUnixNano': str(span['start']),
+                'endTimeUnixNano': str(span['end']),
+                'attributes': attributes(span['attributes']),
+            }
+            for span in self.spans
+        ]
+        return {
+            'resourceSpans': [{
+                'resource': {'attributes': attributes({'service.name': 'instruity'})},
+                'scopeSpans': [{'scope': {'name': 'instruity'}, 'spans': spans}],
+            }]
+        }
+
+
+class TracedSource(discord.AudioSource):
+    """Audio source wrapper that closes the trace when the first frame is sent.
+
+    The audio player sends a frame right after reading it,
+    so the second read marks the moment the first packet left.
+    """
+
+    def __init__(self, source: discord.AudioSource, trace: Trace):
+        self.source = source
+        self.trace = trace
+        self.reads = 0
+        trace.mark('voice_play')
+
+    def read(self) -> bytes:
+        if self.reads == 0:
+            self.trace.span_since('voice_play', 'voice_play')
+        elif self.reads == 1:
+            self.trace.span_since('first_packet', 'first_frame')
+            self.trace.finish()
+
+        data = self.source.read()
+        if self.reads == 0:
+            self.trace.span_since('ffmpeg_start', 'restart')
+            self.trace.mark('first_frame')
+        self.reads += 1
+        return data
+
+    def is_opus(self) -> bool:
+        return self.source.is_opus()
+
+    def cleanup(self) -> None:
+        self.source.cleanup()
+        self.trace.finish('stopped')
+
+
+def trace_span(trace: Trace | None, name: str, **attributes):
+    """Record a span if the request is traced."""
+    if trace is None:
+        return contextlib.nullcontext()
+    return trace.span(name, **attributes)
+
+
+def percentile(values: typing.Sequence[float], p: float) -> float:
+    """Nearest-rank percentile."""
+    ordered = sorted(values)
+    index = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[index]
+
+
+class Tracer:
+    """Collects finished traces, keeps recent durations for summaries and exports traces in the background."""
+
+    def __init__(self, file: str | None = TRACE_FILE, endpoint: str | None = TRACE_ENDPOINT):
+        self.file = file
+        self.endpoint = endpoint
+        # (bot, guild) -> span name -> recent durations in ms
+        self.samples: typing.Dict[typing.Tuple[str, int], typing.Dict[str, typing.Deque[float]]] = \
+            collections.defaultdict(lambda: collections.defaultdict(lambda: collections.deque(maxlen=SAMPLES_PER_KEY)))
+        self._lock = threading.Lock()
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._worker: threading.Thread | None = None
+
+    def record(self, trace: Trace) -> None:
+        with self._lock:
+            samples = self.samples[(trace.bot, trace.guild)]
+            if trace.status == 'ok':
+                samples['total'].append((trace.end - trace.start) / 1e6)
+            for span in trace.spans:
+                samples[span['name']].append((span['end'] - span['start']) / 1e6)
+
+            if self.file or self.endpoint:
+                self._queue.put(trace)
+                if self._worker is None:
+                    self._worker = threading.Thread(target=self._export_loop, name='trace-exporter', daemon=True)
+                    self._worker.start()
+
+    def _export_loop(self) -> None:
+        while True:
+            trace = self._queue.get()
+            try:
+                if self.file:
+                    with open(self.file, 'a', encoding='utf-8') as f:
+                        f.write(json.dumps(trace.to_dict(), ensure_ascii=False) + '\n')
+                if self.endpoint:
+                    request = urllib.request.Request(
+                        self.endpoint,
+                        data=json.dumps(trace.to_otlp()).encode(),
+                        headers={'Content-Type': 'application/json'},
+                    )
+                    urllib.request.urlopen(request, timeout=5).close()
+            except Exception as e:
+                logger.warning(f'Failed to export trace {trace.trace_id}: {e}')
+
+    def summary(self, bot: str | None = None, guild: int | None = None) -> typing.Dict[str, dict]:
+        """Percentiles of every span, filtered by bot and guild."""
+        merged: typing.Dict[str, typing.List[float]] = collections.defaultdict(list)
+        with self._lock:
+            for (trace_bot, trace_guild), spans in self.samples.items():
+                if bot is not None and trace_bot != bot:
+                    continue
+                if guild is not None and trace_guild != guild:
+                    continue
+                for name, durations in spans.items():
+                    merged[name].extend(durations)
+
+        return {
+            name: {
+                'count': len(durations),
+                **{f'p{p}': round(percentile(durations, p), 1) for p in PERCENTILES},
+            }
+            for name, durations in merged.items()
+            if durations
+        }
+
+
+tracer = Tracer()
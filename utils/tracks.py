@@ -0,0 +1,68 @@
+import base64
+import collections
+import hashlib
+import os
+import time
+import typing
+
+from utils.storage import JsonFile
+
+TRACK_REGISTRY = os.environ.get('TRACK_REGISTRY') or 'tracks.json'
+MAX_ENTRIES = 5000  # least recently used entries are evicted
+MAX_TRACKS_PER_ENTRY = 100  # bigger playlists are stored by their search only
+STREAM_URL_TTL = 60 * 60  # stream URLs expire, older ones are resolved again on load
+
+
+def track_id(key: str) -> str:
+    """Short opaque ID of a search or URL, the same key always gets the same ID."""
+    digest = hashlib.blake2b(key.encode(), digest_size=6).digest()
+    return base64.urlsafe_b64encode(digest).decode()
+
+
+class TrackRegistry:
+    """Persistent LRU registry of resolved tracks, so buttons can carry a short ID instead of a URL.
+
+    Every entry keeps the original search and the metadata of its tracks (as accepted by `Song`),
+    so the tracks can be queued again without searching.
+    """
+
+    def __init__(self, path: str = TRACK_REGISTRY, max_entries: int = MAX_ENTRIES):
+        self.file = JsonFile(path)
+        self.max_entries = max_entries
+        self.entries: typing.OrderedDict[str, dict] = collections.OrderedDict(self.file.load(default={}))
+
+    def __contains__(self, id: str) -> bool:
+        return id in self.entries
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def add(self, search: str, tracks: typing.List[dict]) -> str:
+        """Remember resolved tracks of a search and return their ID."""
+        id = track_id(search)
+        self.entries[id] = {
+            'search': search,
+            'tracks': tracks if len(tracks) <= MAX_TRACKS_PER_ENTRY else None,
+            'resolved_at': int(time.time()),
+        }
+        self.entries.move_to_end(id)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+        self.file.schedule_save(lambda: self.entries)
+        return id
+
+    def get(self, id: str) -> dict | None:
+        """Get an entry by ID, stream URLs that may have expired are dropped from the returned tracks."""
+        entry = self.entries.get(id)
+        if entry is None:
+            return None
+        self.entries.move_to_end(id)
+
+        if entry['tracks'] is None:
+            return {**entry}
+        fresh = time.time() - entry['resolved_at'] < STREAM_URL_TTL
+        tracks = [track if fresh else {**track, 'url': None} for track in entry['tracks']]
+        return {**entry, 'tracks': tracks}
+
+
+registry = TrackRegistry()